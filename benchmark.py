@@ -0,0 +1,383 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Benchmarks for OmniFlow
+#   python benchmark.py startup [--runs 5]
+#   python benchmark.py queries [--iterations 2000]
+#   python benchmark.py generate --orders 100000 [--seed 1]
+#   python benchmark.py suite [--runs 5]
+# queries, generate and suite use a database of their own (--database, default
+# omniflow_bench) so the shop's data is never touched.
+
+RESULTS_DIR = "benchmarks"
+BENCH_DATABASE = "omniflow_bench"
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def save_results(name, results):
+    # Write a timestamped JSON file so runs can be compared over time
+    os.makedirs(os.path.join(APP_DIR, RESULTS_DIR), exist_ok=True)
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    path = os.path.join(APP_DIR, RESULTS_DIR, filename)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"Results saved: {path}")
+    return path
+
+def summarize(samples):
+    # Min/median/max of a list of timings (seconds)
+    return {
+        'runs': len(samples),
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'max': max(samples),
+    }
+
+def open_app(database):
+    # Import the app and point it at the benchmark database
+    import main as app
+    app.DB_CONFIG['database'] = database
+    if not app.connect_database() or not app.run_migrations():
+        sys.exit(f"Cannot open database {database}")
+    return app
+
+def time_runs(call, runs):
+    # Seconds for each of runs calls
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+# Startup Benchmark
+def bench_startup(runs):
+    # Launch main.py until the login window is drawn, several times
+    in_process = []
+    wall = []
+    for i in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, os.path.join(APP_DIR, "main.py"), "--startup-benchmark"],
+            cwd=APP_DIR, stdout=subprocess.PIPE, text=True
+        )
+        seconds = None
+        for line in proc.stdout:
+            if line.startswith("STARTUP_SECONDS"):
+                seconds = float(line.split()[1])
+                wall.append(time.perf_counter() - started)
+                break
+        proc.wait()
+        if seconds is None:
+            print(f"Run {i + 1}: app exited without showing a window")
+            continue
+        in_process.append(seconds)
+        print(f"Run {i + 1}: {wall[-1]:.2f}s to login window ({seconds:.2f}s inside the app)")
+
+    if not in_process:
+        return None
+    results = {
+        'benchmark': 'startup',
+        'python': sys.version.split()[0],
+        'time_to_login_window': summarize(wall),
+        'in_process': summarize(in_process),
+    }
+    save_results("startup", results)
+    return results
+
+# Query Benchmark
+# Typical reads the app repeats many times, with parameters for call i
+QUERY_CASES = [
+    ("customer by contact", "SELECT id, name, contact FROM customers WHERE contact = %s",
+     lambda i: (f"9{i % 1000:09d}",)),
+    ("autocomplete prefix",
+     "SELECT id, name, contact FROM customers WHERE name LIKE %s OR contact LIKE %s LIMIT %s",
+     lambda i: ("ra%", "ra%", 5)),
+    ("customer stats", "SELECT order_count, total_spent FROM customer_stats WHERE customer_id = %s",
+     lambda i: (i % 100 + 1,)),
+    ("rollup range",
+     "SELECT COALESCE(SUM(order_count), 0) AS orders FROM daily_rollups WHERE day BETWEEN %s AND %s",
+     lambda i: (date(2024, 1, 1), date(2024, 1, 31))),
+]
+BATCH_ROWS = 200    # Rows written by the run_query vs execute_many case
+
+def time_calls(call, iterations):
+    # Mean microseconds per call after a short warm-up
+    for i in range(min(50, iterations)):
+        call(i)
+    started = time.perf_counter()
+    for i in range(iterations):
+        call(i)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def bench_queries(database, iterations):
+    # Per-query overhead with plain text queries vs cached prepared statements
+    app = open_app(database)
+    cache_size = app.STATEMENT_CACHE_SIZE
+    modes = [("plain", 0), ("prepared", cache_size)]
+    results = {'benchmark': 'queries', 'python': sys.version.split()[0],
+               'iterations': iterations, 'statement_cache_size': cache_size, 'cases': {}}
+    
+    try:
+        for label, query, params in QUERY_CASES:
+            case = {}
+            for mode, size in modes:
+                app.STATEMENT_CACHE_SIZE = size
+                case[mode] = time_calls(lambda i: app.fetch_data(query, params(i)), iterations)
+            results['cases'][label] = case
+            print(f"{label:22} plain {case['plain']:8.1f} us   prepared {case['prepared']:8.1f} us")
+        
+        # Writes: one run_query per row vs one execute_many
+        app.run_query("CREATE TABLE IF NOT EXISTS benchmark_rows (id INT PRIMARY KEY, value INT)")
+        insert = "INSERT INTO benchmark_rows (id, value) VALUES (%s, %s)"
+        update = "UPDATE benchmark_rows SET value = value + 1 WHERE id = %s"
+        rows = [(i, 0) for i in range(BATCH_ROWS)]
+        writes = {}
+        for mode, size in modes:
+            app.STATEMENT_CACHE_SIZE = size
+            app.run_query("DELETE FROM benchmark_rows")
+            started = time.perf_counter()
+            for row in rows:
+                app.run_query(insert, row)
+            for row in rows:
+                app.run_query(update, row[:1])
+            writes[f"run_query_{mode}"] = (time.perf_counter() - started) / (2 * BATCH_ROWS) * 1e6
+            
+            app.run_query("DELETE FROM benchmark_rows")
+            started = time.perf_counter()
+            app.execute_many(insert, rows)
+            app.execute_many(update, [row[:1] for row in rows])
+            writes[f"execute_many_{mode}"] = (time.perf_counter() - started) / (2 * BATCH_ROWS) * 1e6
+        app.run_query("DROP TABLE benchmark_rows")
+        results['writes_per_row_us'] = writes
+        for label, micros in writes.items():
+            print(f"{label:22} {micros:8.1f} us per row")
+    finally:
+        app.STATEMENT_CACHE_SIZE = cache_size
+        app.close_database()
+    
+    save_results("queries", results)
+    return results
+
+# Synthetic Data
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Arjun", "Sai", "Rohan", "Karthik", "Rahul",
+               "Ananya", "Diya", "Priya", "Kavya", "Meera", "Lakshmi", "Divya", "Sneha",
+               "Farhan", "Imran", "Joseph", "Thomas", "Gurpreet", "Harpreet", "Nisha", "Pooja"]
+LAST_NAMES = ["Sharma", "Verma", "Iyer", "Nair", "Reddy", "Rao", "Patel", "Shah", "Khan",
+              "Singh", "Das", "Menon", "Pillai", "Gupta", "Joshi", "Mehta", "Kumar", "Bose"]
+# (garment, weight, base price, typical measurements; 0 means not taken)
+GARMENTS = [
+    ("Shirt", 40, 900, {'chest': 40, 'waist': 34, 'hip': 38, 'length': 29, 'sleeve_length': 24}),
+    ("Kurta", 25, 1400, {'chest': 40, 'waist': 35, 'hip': 40, 'length': 40, 'sleeve_length': 23}),
+    ("Trouser", 18, 1100, {'chest': 0, 'waist': 33, 'hip': 39, 'length': 40, 'sleeve_length': 0}),
+    ("Blazer", 10, 4500, {'chest': 41, 'waist': 35, 'hip': 39, 'length': 30, 'sleeve_length': 25}),
+    ("Saree Blouse", 7, 800, {'chest': 35, 'waist': 29, 'hip': 0, 'length': 15, 'sleeve_length': 8}),
+]
+FABRICS = (["Cotton", "Silk", "Linen", "Synthetic"], [50, 15, 20, 15])
+COLLARS = (["Regular", "Mandarin", "Spread", "Button-Down", "None"], [45, 20, 15, 10, 10])
+SLEEVES = (["Full", "Half", "Three-Quarter", "Sleeveless"], [55, 30, 10, 5])
+FITS = (["Slim Fit", "Regular Fit", "Loose Fit", "Custom"], [30, 50, 10, 10])
+SYNTHETIC_CONTACT_PREFIX = "7"  # Generated customers are 7000000000 upwards
+
+def generate_customers(rng, count):
+    # (name, contact) for count customers
+    return [(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+             f"{SYNTHETIC_CONTACT_PREFIX}{i:09d}") for i in range(count)]
+
+def generate_orders(rng, customers, count, days):
+    # Import rows for count orders over the last days days. A few customers
+    # place most orders, recent orders are more common, and an order's status
+    # depends on how old it is.
+    garments = [g[0] for g in GARMENTS]
+    weights = [g[1] for g in GARMENTS]
+    details = {g[0]: g for g in GARMENTS}
+    now = datetime.now()
+    for _ in range(count):
+        name, contact = customers[int(len(customers) * rng.random() ** 3)]
+        garment = rng.choices(garments, weights)[0]
+        _, _, base_price, means = details[garment]
+        age = days * rng.random() ** 2
+        created = now - timedelta(days=age, seconds=rng.randrange(86400))
+        if age > 30:
+            status = rng.choices(["Delivered", "Ready"], [97, 3])[0]
+        elif age > 7:
+            status = rng.choices(["Delivered", "Ready", "In Progress"], [60, 25, 15])[0]
+        else:
+            status = rng.choices(["Pending", "In Progress", "Ready"], [50, 35, 15])[0]
+        yield {
+            'customer_name': name,
+            'contact': contact,
+            'garment_type': garment,
+            'fabric': rng.choices(*FABRICS)[0],
+            'measurements': {key: round(max(rng.gauss(mean, mean * 0.08), 0), 1) if mean else 0.0
+                             for key, mean in means.items()},
+            'collar_type': rng.choices(*COLLARS)[0],
+            'sleeve_type': rng.choices(*SLEEVES)[0],
+            'fit_type': rng.choices(*FITS)[0],
+            'delivery_date': (created + timedelta(days=rng.randint(5, 21))).date().isoformat(),
+            'notes': rng.choice(["", "", "", "Urgent", "Extra buttons", "Double stitch"]),
+            'price': round(base_price * rng.uniform(0.8, 1.6), -1),
+            'status': status,
+            'created_at': created.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+def generate(database, orders, customers, seed, days, batch_size):
+    # Load seeded synthetic customers and orders through the import pipeline,
+    # so customer stats, rollups and measurements are filled in as well
+    app = open_app(database)
+    rng = random.Random(seed)
+    people = generate_customers(rng, customers or max(orders // 5, 1))
+    result = {'rows': 0, 'customers': 0, 'orders': 0, 'rejected': 0, 'rejects_file': None}
+    
+    def reject(line_no, reason, row):
+        result['rejected'] += 1
+        print(f"Row {line_no} rejected: {reason}")
+    
+    started = time.perf_counter()
+    batch = []
+    try:
+        for n, row in enumerate(generate_orders(rng, people, orders, days), 1):
+            customer, order = app.parse_import_row(row)
+            batch.append((n, row, customer, order))
+            if len(batch) >= batch_size:
+                app.import_batch(batch, result, reject)
+                batch = []
+                if n % (batch_size * 50) == 0:
+                    print(f"{n:,} orders", flush=True)
+        if batch:
+            app.import_batch(batch, result, reject)
+    finally:
+        app.close_database()
+    print(f"Generated {result['orders']:,} orders for {len(people):,} customers "
+          f"in {time.perf_counter() - started:.1f}s")
+
+# Benchmark Suite
+SUITE_PAGES = 20            # Keyset pages walked by the scroll cases
+SUITE_PDFS = 50             # Job cards rendered per PDF run
+SUITE_SAVES = 50            # Orders saved per save_order run
+
+def bench_suite(database, runs):
+    # Time each page's data path, PDF generation and save_order
+    app = open_app(database)
+    app.logged_in_user = "benchmark"
+    cases = {}
+    
+    def case(name, call, count=1):
+        # count > 1 reports time per item rather than per run
+        samples = [seconds / count for seconds in time_runs(call, runs)]
+        cases[name] = summarize(samples)
+        print(f"{name:28} median {cases[name]['median'] * 1000:9.2f} ms")
+    
+    def walk(fetch_page, **filters):
+        # Scroll a keyset list SUITE_PAGES pages deep
+        after = None
+        for _ in range(SUITE_PAGES):
+            rows, has_more = fetch_page(after=after, **filters)
+            if not has_more:
+                break
+            after = (rows[-1]['created_at'], rows[-1]['id'])
+    
+    try:
+        counts = app.fetch_one(
+            "SELECT (SELECT COUNT(*) FROM orders) AS orders, "
+            "(SELECT COUNT(*) FROM customers) AS customers"
+        )
+        print(f"{counts['orders']:,} orders, {counts['customers']:,} customers")
+        
+        # Dashboard (recounted every run)
+        def dashboard():
+            app.invalidate_dashboard_cache()
+            app.load_dashboard_data()
+        case("dashboard", dashboard)
+        
+        # All Orders
+        case("orders_first_page", lambda: app.fetch_orders_page())
+        case("orders_first_page_ready", lambda: app.fetch_orders_page(status="Ready"))
+        case("orders_scroll_per_page", lambda: walk(app.fetch_orders_page), SUITE_PAGES)
+        
+        # Customers
+        case("customers_first_page", lambda: app.fetch_customers_page())
+        case("customers_scroll_per_page", lambda: walk(app.fetch_customers_page), SUITE_PAGES)
+        
+        # New Order autocomplete
+        case("customer_index_load", app.load_customer_index)
+        case("autocomplete_lookup", lambda: [app.search_customer_index(prefix)
+                                             for prefix in ("aa", "pr", "sha", "70")], 4)
+        
+        # Measurement search
+        case("measurement_search",
+             lambda: app.find_orders_by_measurement("chest", ">", 44, "Blazer"))
+        
+        # PDFs (job cards, so no invoice numbers are used up)
+        orders = app.fetch_batch_orders(status="Ready")[:SUITE_PDFS]
+        if orders:
+            folder = tempfile.mkdtemp(prefix="omniflow_pdfs_")
+            case("pdf_jobcard_per_pdf",
+                 lambda: app.generate_pdf_batch("jobcard", orders, folder=folder), len(orders))
+        
+        # save_order (adds SUITE_SAVES orders per run to the benchmark database)
+        rng = random.Random(0)
+        people = generate_customers(rng, 100)
+        
+        def save_orders():
+            for row in generate_orders(rng, people, SUITE_SAVES, 1):
+                del row['status'], row['created_at']
+                app.create_order(row)
+        case("save_order", save_orders, SUITE_SAVES)
+    finally:
+        app.close_database()
+    
+    results = {
+        'benchmark': 'suite',
+        'python': sys.version.split()[0],
+        'database': database,
+        'orders': counts['orders'],
+        'customers': counts['customers'],
+        'runs': runs,
+        'cases': cases,
+    }
+    save_results("suite", results)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="OmniFlow benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    startup = commands.add_parser("startup", help="time from launch to the login window")
+    startup.add_argument("--runs", type=int, default=5)
+    
+    queries = commands.add_parser("queries", help="per-query overhead, plain vs prepared")
+    queries.add_argument("--iterations", type=int, default=2000)
+    queries.add_argument("--database", default=BENCH_DATABASE)
+
+    generator = commands.add_parser("generate", help="load seeded synthetic customers and orders")
+    generator.add_argument("--orders", type=int, default=100000, help="e.g. 1000, 100000, 1000000")
+    generator.add_argument("--customers", type=int, help="default: one per five orders")
+    generator.add_argument("--seed", type=int, default=1)
+    generator.add_argument("--days", type=int, default=730, help="history to spread orders over")
+    generator.add_argument("--batch-size", type=int, default=1000)
+    generator.add_argument("--database", default=BENCH_DATABASE)
+    
+    suite = commands.add_parser("suite", help="time page data, PDFs and save_order")
+    suite.add_argument("--runs", type=int, default=5)
+    suite.add_argument("--database", default=BENCH_DATABASE)
+    
+    args = parser.parse_args()
+    if args.command == "startup":
+        bench_startup(args.runs)
+    elif args.command == "queries":
+        bench_queries(args.database, args.iterations)
+    elif args.command == "generate":
+        generate(args.database, args.orders, args.customers, args.seed, args.days, args.batch_size)
+    elif args.command == "suite":
+        bench_suite(args.database, args.runs)
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,199 @@
+import time
+APP_START = time.perf_counter()  # Startup is measured from here
+
 import customtkinter as ctk
-from tkinter import messagebox
-from tkcalendar import DateEntry
+import tkinter
+from tkinter import filedialog, messagebox
 import mysql.connector
+import argparse
+import bisect
+import csv
+import functools
+import gzip
+import importlib
 import json
-from datetime import datetime
-from reportlab.lib.pagesizes import letter  
-from reportlab.pdfgen import canvas
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure 
+import math
+import multiprocessing
+import os
+import queue
+import re
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+# Matplotlib and ReportLab are slow to import and only needed on the
+# dashboard and for PDFs, so they are imported where they're used and
+# preloaded in the background once the login window is up.
+HEAVY_MODULES = [
+    "matplotlib.figure",
+    "matplotlib.backends.backend_agg",
+    "reportlab.lib.pagesizes",
+    "reportlab.pdfgen.canvas",
+]
 
 # Setting up the theme
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
 # Global variables
-connection = None
 logged_in_user = None
 window = None
 main_area = None
 form_fields = {}
 
 DEBUG_MODE = False  # Set to True to skip login
+PRELOAD_DELAY_MS = 300  # Wait after the login window shows before preloading
+PDF_WORKERS = os.cpu_count() or 2  # Processes rendering batch PDFs
+
+# Database settings
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': 'sasikala',
+    'database': 'stitchsync'
+}
+DB_POOL_SIZE = 5        # Max open connections shared by all threads
+DB_POOL_TIMEOUT = 10    # Seconds to wait when every connection is busy
+DB_PING_AFTER = 60      # Ping connections idle longer than this (seconds)
+STATEMENT_CACHE_SIZE = 64   # Prepared statements kept per connection (0 turns the cache off)
+
+# Connection pool state
+db_pool = None          # Idle connections as (connection, released_at)
+db_pool_lock = threading.Lock()
+db_pool_count = 0       # Connections currently open (idle + checked out)
+db_local = threading.local()
+
+# Errors that mean the connection itself is dead
+CONNECTION_ERRORS = (mysql.connector.errors.OperationalError,
+                     mysql.connector.errors.InterfaceError)
+
+# Background query state
+DB_WORKERS = 3          # Worker threads running queries off the Tk thread
+UI_POLL_MS = 30         # How often the Tk thread picks up finished work
+db_executor = None
+ui_results = queue.Queue()  # (callback, args) waiting for the Tk thread
+page_token = 0          # Bumped on every page switch
+pending_jobs = []       # Futures belonging to the current page
+
+# Page cache (each page is built once per login, then hidden and shown)
+pages = {}              # Page name -> {'frame', 'refresh', 'on_changes'}
+current_page = None
+
+# List settings
+ORDERS_PAGE_SIZE = 50       # Orders fetched per keyset page
+ORDER_ROW_HEIGHT = 130      # Height of one order card
+CUSTOMERS_PAGE_SIZE = 50    # Customers fetched per keyset page
+CUSTOMER_ROW_HEIGHT = 130   # Height of one customer card
+
+# Autocomplete settings
+SUGGESTION_LIMIT = 5            # Suggestions shown under the name field
+AUTOCOMPLETE_DELAY_MS = 120     # Pause in typing before looking up
+
+# Import settings
+IMPORT_BATCH_SIZE = 1000    # Rows written per transaction
+ORDER_STATUSES = ["Pending", "In Progress", "Ready", "Delivered"]
+
+# Measurement settings
+MEASUREMENT_KEYS = ["chest", "waist", "hip", "length", "sleeve_length"]
+MEASUREMENT_OPERATORS = [">", ">=", "<", "<=", "="]
+MEASUREMENT_MAX = 9999.99   # Largest value order_measurements can hold
+
+# Archive settings
+ARCHIVE_AFTER_DAYS = 90             # Delivered orders older than this move to orders_archive
+ARCHIVE_BATCH_SIZE = 500            # Orders moved per transaction
+ARCHIVE_START_MS = 60 * 1000        # First archive run after startup
+ARCHIVE_BATCH_GAP_MS = 2000         # Pause between batches while there is a backlog
+ARCHIVE_INTERVAL_MS = 6 * 60 * 60 * 1000    # Between runs once the backlog is cleared
+
+# Change feed settings
+CHANGE_POLL_MS = 1000           # Pause between polls of change_log
+CHANGE_POLL_LIMIT = 500         # Entries read per poll
+CHANGE_GAP_WAIT_S = 10          # How long a missing change_log id is waited for
+CHANGE_LOG_KEEP_DAYS = 2        # Older entries are pruned by the archive job
+TERMINAL_ID = uuid.uuid4().hex[:12]     # Tags this terminal's own entries
+change_feed = {
+    'running': False,
+    'after': None,              # Every id up to this one has been handled
+    'seen': set(),              # Handled ids beyond it, waiting on a gap
+    'gaps': {},                 # Missing id -> when it was first missed
+}
+
+# Migration settings
+MIGRATION_LOCK_WAIT_S = 60      # One wait for another terminal's migration
+MIGRATION_LOCK_TRIES = 10       # Waits before giving up
+
+# Export settings
+EXPORT_CHUNK_SIZE = 5000    # Rows pulled from the server per fetch
+EXPORT_FORMATS = ["csv", "jsonl", "columns"]
+
+# Diagnostics settings
+QUERY_STATS_ENABLED = True      # Record query timings (Diagnostics page switch)
+SLOW_QUERY_MS = 200             # Queries at least this slow go to the slow log
+SLOW_QUERY_LOG = "slow_queries.log"
+LATENCY_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000]
+query_stats = {}                # SQL fingerprint -> calls, timings, rows, histogram, call sites
+query_stats_lock = threading.Lock()
+slow_log_lock = threading.Lock()
+page_timings = {}               # Page name -> render counts and times
+page_timing = {}                # The page being shown: name, started, token, data_ms
+
+# Sequence blocks reserved by this terminal (name -> [next, end))
+SEQUENCE_BLOCK_SIZE = 20
+sequence_blocks = {}
+sequence_lock = threading.Lock()
+
+# Shop settings (read once, refreshed when saved)
+shop_settings = None
+shop_settings_lock = threading.Lock()
+
+# Dashboard cache
+dashboard_cache = None          # Last dashboard numbers, cleared by order writes
+dashboard_version = 0           # Bumped on every invalidation
+dashboard_cache_lock = threading.Lock()
+
+# Dashboard chart (one figure reused for the whole session)
+CHART_COLORS = ['#3b8ed0', '#ca5010', '#107c10', '#8764b8', '#00bcf2']
+dashboard_figure = None
+dashboard_chart = {}            # Axes, artists, and the key/image last rendered
+dashboard_chart_lock = threading.Lock()
+
+# Customer search index (loaded at login)
+customer_index = []             # Sorted (search key, customer id) pairs
+customers_by_id = None          # customer id -> {'id', 'name', 'contact'}
+customer_index_lock = threading.Lock()
+VIRTUAL_LIST_BUFFER = 3     # Spare row widgets kept beyond the visible ones
+VIRTUAL_LIST_PREFETCH = 10  # Fetch the next page this many rows before the end
 
 # Database Functions
+def open_connection():
+    # Open a new MySQL connection
+    conn = mysql.connector.connect(autocommit=True, **DB_CONFIG)
+    conn.statement_cache = OrderedDict()    # SQL text -> (SQL text, prepared cursor)
+    return conn
+
 def connect_database():
-    # Connect to MySQL database
-    global connection
+    # Set up the connection pool
+    global db_pool, db_pool_count
     try:
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='sasikala',
-            database='stitchsync'
-        )
+        first = open_connection()
+        db_pool = queue.LifoQueue()
+        db_pool_count = 1
+        db_pool.put((first, time.monotonic()))
         print("Database connected!")
         return True
     except:
         # Create database if doesn't exist
         try:
-            temp_conn = mysql.connector.connect(
-                host='localhost',
-                user='root',
-                password='sasikala'
-            )
+            server_config = {k: v for k, v in DB_CONFIG.items() if k != 'database'}
+            temp_conn = mysql.connector.connect(**server_config)
             cursor = temp_conn.cursor()
-            cursor.execute("CREATE DATABASE stitchsync")
+            cursor.execute(f"CREATE DATABASE {DB_CONFIG['database']}")
             cursor.close()
             temp_conn.close()
             print("Database created!")
@@ -54,115 +202,610 @@ def connect_database():
             messagebox.showerror("Error", f"Cannot connect: {e}")
             return False
 
-def create_tables():
-    # Create all required tables
-    global connection
+def get_connection():
+    # Check out a healthy connection, opening a new one while under DB_POOL_SIZE
+    global db_pool_count
     try:
-        cursor = connection.cursor()
-        
+        conn, released_at = db_pool.get_nowait()
+    except queue.Empty:
+        with db_pool_lock:
+            can_open = db_pool_count < DB_POOL_SIZE
+            if can_open:
+                db_pool_count += 1
+        if can_open:
+            try:
+                return open_connection()
+            except Exception:
+                with db_pool_lock:
+                    db_pool_count -= 1
+                raise
+        try:
+            conn, released_at = db_pool.get(timeout=DB_POOL_TIMEOUT)
+        except queue.Empty:
+            raise mysql.connector.errors.PoolError("No free database connection")
+
+    # MySQL drops idle sessions after wait_timeout, so check long-idle ones
+    if time.monotonic() - released_at > DB_PING_AFTER:
+        try:
+            try:
+                conn.ping()
+            except CONNECTION_ERRORS:
+                # A new session starts without our prepared statements
+                conn.statement_cache = OrderedDict()
+                conn.ping(reconnect=True, attempts=3, delay=1)
+        except Exception:
+            discard_connection(conn)
+            raise
+    return conn
+
+def release_connection(conn):
+    # Return a connection to the pool
+    db_pool.put((conn, time.monotonic()))
+
+def discard_connection(conn):
+    # Drop a broken connection so the pool can open a fresh one
+    global db_pool_count
+    with db_pool_lock:
+        db_pool_count -= 1
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+def close_database():
+    # Close every idle connection in the pool
+    if db_pool is None:
+        return
+    while True:
+        try:
+            conn, _ = db_pool.get_nowait()
+        except queue.Empty:
+            break
+        discard_connection(conn)
+
+@contextmanager
+def db_connection():
+    # Pin a pooled connection to this thread; nested calls share it
+    conn = getattr(db_local, 'connection', None)
+    if conn is not None:
+        yield conn
+        return
+
+    conn = get_connection()
+    db_local.connection = conn
+    broken = False
+    try:
+        yield conn
+    except CONNECTION_ERRORS:
+        broken = True
+        raise
+    finally:
+        db_local.connection = None
+        if broken:
+            discard_connection(conn)
+        else:
+            release_connection(conn)
+
+@contextmanager
+def db_cursor(dictionary=False):
+    # Give this thread a cursor of its own on the thread's connection
+    with db_connection() as conn:
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+def prepared_statement(conn, query, values):
+    # Run query as a server-side prepared statement, reusing the connection's
+    # cursor for the same SQL text (least recently used ones are closed).
+    # Returns the cursor with its results unread.
+    cache = conn.statement_cache
+    entry = cache.pop(query, None)
+    if entry is None:
+        if len(cache) >= STATEMENT_CACHE_SIZE:
+            _, (_, oldest) = cache.popitem(last=False)
+            oldest.close()
+        # The cursor only skips re-preparing for the very same string object
+        entry = (query, conn.cursor(prepared=True))
+    cached_query, cursor = entry
+    try:
+        cursor.execute(cached_query, values)
+    except Exception:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        raise
+    cache[query] = entry
+    return cursor
+
+@contextmanager
+def transaction():
+    # Run a block as one transaction on this thread's connection; commits at
+    # the end, rolls back on any error. Nested calls join the outer one.
+    # run_query/fetch_data inside the block raise instead of returning
+    # False/[], so a failed step rolls back the whole unit.
+    with db_cursor() as cursor:
+        conn = db_local.connection
+        if conn.in_transaction:
+            yield cursor
+            return
+        conn.start_transaction()
+        db_local.transaction = True
+        try:
+            yield cursor
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            db_local.transaction = False
+
+def in_transaction():
+    # True inside a transaction() block on this thread
+    return getattr(db_local, 'transaction', False)
+
+# Schema Migrations
+# Each migration runs once, in order, and is recorded in schema_version.
+# A step is either an SQL string or a function taking the cursor. DDL commits
+# as it goes, so each finished step is also recorded in schema_steps and a
+# migration that failed part way resumes after its last finished step.
+# Never edit a migration that has shipped; add a new one instead.
+
+CUSTOMER_STATS_REFRESH_SQL = """
+    INSERT INTO customer_stats (customer_id, order_count, total_spent, last_order_at)
+    SELECT c.id, COUNT(*), SUM(o.price), MAX(o.created_at)
+    FROM customers c JOIN orders o ON o.contact = c.contact
+    GROUP BY c.id
+    ON DUPLICATE KEY UPDATE order_count = VALUES(order_count),
+                            total_spent = VALUES(total_spent),
+                            last_order_at = VALUES(last_order_at)
+"""
+
+DAILY_ROLLUPS_REFRESH_SQL = """
+    INSERT INTO daily_rollups (day, garment_type, status, order_count, revenue)
+    SELECT DATE(created_at), garment_type, COALESCE(status, 'Pending'), COUNT(*), SUM(price)
+    FROM orders
+    GROUP BY DATE(created_at), garment_type, COALESCE(status, 'Pending')
+    ON DUPLICATE KEY UPDATE order_count = VALUES(order_count),
+                            revenue = VALUES(revenue)
+"""
+
+MIGRATIONS = [
+    (1, "Base tables", [
         # Users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL
-            )
-        """)
-        
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL
+        )
+        """,
         # Add default admin user
-        cursor.execute("SELECT COUNT(*) FROM users WHERE username = 'admin'")
-        if cursor.fetchone()[0] == 0:
-            cursor.execute("INSERT INTO users (username, password) VALUES ('admin', 'admin123')")
-        
+        "INSERT IGNORE INTO users (username, password) VALUES ('admin', 'admin123')",
         # Customers table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS customers (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                contact VARCHAR(20) UNIQUE NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
+        """
+        CREATE TABLE IF NOT EXISTS customers (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            contact VARCHAR(20) UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
         # Orders table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS orders (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                order_id VARCHAR(20) UNIQUE NOT NULL,
-                customer_name VARCHAR(100) NOT NULL,
-                contact VARCHAR(20) NOT NULL,
-                garment_type VARCHAR(50) NOT NULL,
-                fabric VARCHAR(50) NOT NULL,
-                measurements TEXT NOT NULL,
-                collar_type VARCHAR(50),
-                sleeve_type VARCHAR(50),
-                fit_type VARCHAR(50),
-                delivery_date DATE NOT NULL,
-                notes TEXT,
-                price DECIMAL(10, 2) NOT NULL,
-                status VARCHAR(20) DEFAULT 'Pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
+        """
+        CREATE TABLE IF NOT EXISTS orders (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            order_id VARCHAR(20) UNIQUE NOT NULL,
+            customer_name VARCHAR(100) NOT NULL,
+            contact VARCHAR(20) NOT NULL,
+            garment_type VARCHAR(50) NOT NULL,
+            fabric VARCHAR(50) NOT NULL,
+            measurements TEXT NOT NULL,
+            collar_type VARCHAR(50),
+            sleeve_type VARCHAR(50),
+            fit_type VARCHAR(50),
+            delivery_date DATE NOT NULL,
+            notes TEXT,
+            price DECIMAL(10, 2) NOT NULL,
+            status VARCHAR(20) DEFAULT 'Pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
         # Settings table
+        """
+        CREATE TABLE IF NOT EXISTS settings (
+            id INT PRIMARY KEY,
+            shop_name VARCHAR(100) NOT NULL,
+            address TEXT NOT NULL,
+            phone VARCHAR(20) NOT NULL,
+            tax_rate DECIMAL(5, 2) NOT NULL
+        )
+        """,
+        # Add default settings
+        """
+        INSERT IGNORE INTO settings (id, shop_name, address, phone, tax_rate)
+        VALUES (1, 'StitchSync Tailors', '123 Fashion Street', '+91 9876543210', 5.00)
+        """,
+        # Customer stats table (per-customer aggregates kept up to date on every order write)
+        """
+        CREATE TABLE IF NOT EXISTS customer_stats (
+            customer_id INT PRIMARY KEY,
+            order_count INT NOT NULL DEFAULT 0,
+            total_spent DECIMAL(12, 2) NOT NULL DEFAULT 0,
+            last_order_at TIMESTAMP NULL,
+            FOREIGN KEY (customer_id) REFERENCES customers(id) ON DELETE CASCADE
+        )
+        """,
+        CUSTOMER_STATS_REFRESH_SQL,
+        # Daily rollups table (orders and revenue per day, garment and status)
+        """
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            day DATE NOT NULL,
+            garment_type VARCHAR(50) NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            order_count INT NOT NULL DEFAULT 0,
+            revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, garment_type, status)
+        )
+        """,
+        DAILY_ROLLUPS_REFRESH_SQL,
+        # Sequences table (order and invoice number counters)
+        """
+        CREATE TABLE IF NOT EXISTS sequences (
+            name VARCHAR(30) PRIMARY KEY,
+            next_value BIGINT NOT NULL
+        )
+        """,
+        # Continue numbering after the highest existing order
+        """
+        INSERT IGNORE INTO sequences (name, next_value)
+        SELECT seq.name, COALESCE(MAX(CAST(SUBSTRING(o.order_id, 4) AS UNSIGNED)), 0) + 1
+        FROM (SELECT 'order' AS name UNION ALL SELECT 'invoice') seq
+        LEFT JOIN orders o ON TRUE
+        GROUP BY seq.name
+        """,
+    ]),
+    (2, "Indexes for the list, filter, customer and dashboard queries", [
+        # All Orders list, newest first (keyset on created_at, id)
+        "CREATE INDEX idx_orders_created ON orders (created_at, id)",
+        # All Orders status filter and the pending count
+        "CREATE INDEX idx_orders_status_created ON orders (status, created_at, id)",
+        # Batch PDFs: "Ready orders due tomorrow"
+        "CREATE INDEX idx_orders_status_delivery ON orders (status, delivery_date)",
+        # Customer stats upkeep (last order after a delete)
+        "CREATE INDEX idx_orders_contact_created ON orders (contact, created_at)",
+        # Dashboard rollup rebuilds group by garment and status
+        "CREATE INDEX idx_orders_garment_status ON orders (garment_type, status)",
+        # Customer name lookups and the Customers page keyset
+        "CREATE INDEX idx_customers_name ON customers (name)",
+        "CREATE INDEX idx_customers_created ON customers (created_at, id)",
+    ]),
+    (3, "Measurements in their own table", [
+        # One row per order and measurement, so they can be searched and averaged in SQL
+        """
+        CREATE TABLE IF NOT EXISTS order_measurements (
+            order_id INT NOT NULL,
+            name VARCHAR(30) NOT NULL,
+            value DECIMAL(6, 2) NOT NULL,
+            PRIMARY KEY (order_id, name),
+            INDEX idx_measurements_name_value (name, value),
+            FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE
+        )
+        """,
+        lambda cursor: backfill_measurements(cursor),
+    ]),
+    (4, "Orders reference customers by id", [
+        "ALTER TABLE orders ADD COLUMN customer_id INT NULL AFTER order_id",
+        # Orders whose contact has no customer row yet get one
+        """
+        INSERT IGNORE INTO customers (name, contact)
+        SELECT MAX(customer_name), contact FROM orders GROUP BY contact
+        """,
+        lambda cursor: backfill_order_customers(cursor),
+        # Name and contact now come from the customer, so edits reach every order
+        """
+        ALTER TABLE orders
+            MODIFY customer_id INT NOT NULL,
+            ADD INDEX idx_orders_customer_created (customer_id, created_at),
+            ADD CONSTRAINT fk_orders_customer FOREIGN KEY (customer_id) REFERENCES customers(id),
+            DROP INDEX idx_orders_contact_created,
+            DROP COLUMN customer_name,
+            DROP COLUMN contact
+        """,
+    ]),
+    (5, "Archive of delivered orders", [
+        """
+        ALTER TABLE orders
+            ADD COLUMN delivered_at DATETIME NULL AFTER status,
+            ADD INDEX idx_orders_status_delivered (status, delivered_at)
+        """,
+        # When older orders were delivered wasn't recorded; take the delivery date
+        """
+        UPDATE orders SET delivered_at = GREATEST(created_at, delivery_date)
+        WHERE status = 'Delivered'
+        """,
+        # Same columns and indexes as the hot tables (no foreign keys), so rows
+        # move across with INSERT ... SELECT *. Later column changes to orders
+        # or order_measurements must be made to the archive tables too.
+        "CREATE TABLE IF NOT EXISTS orders_archive LIKE orders",
+        "CREATE TABLE IF NOT EXISTS order_measurements_archive LIKE order_measurements",
+    ]),
+    (6, "Change log for syncing terminals", [
+        # entity is order, customer, settings or import; action is insert,
+        # update, delete or archive; terminal is the writer's TERMINAL_ID
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            entity VARCHAR(20) NOT NULL,
+            entity_id INT NOT NULL,
+            action VARCHAR(10) NOT NULL,
+            terminal CHAR(12) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_change_log_created (created_at)
+        )
+        """,
+    ]),
+    (7, "Drop measurements that were never taken", [
+        # The order form stored 0 for blank measurements; those rows made
+        # searches like chest < 30 match every order without a chest
+        lambda cursor: delete_zero_measurements(cursor),
+    ]),
+]
+
+def backfill_measurements(cursor, chunk=1000):
+    # Copy the measurements JSON of existing orders into order_measurements,
+    # a chunk of orders at a time. Values that aren't numbers are skipped.
+    last_id = 0
+    while True:
+        cursor.execute("SELECT id, measurements FROM orders WHERE id > %s ORDER BY id LIMIT %s",
+                       (last_id, chunk))
+        orders = cursor.fetchall()
+        if not orders:
+            break
+        rows = []
+        for order_id, measurements in orders:
+            try:
+                measurements = json.loads(measurements)
+            except ValueError:
+                print(f"Skipping measurements of order {order_id}: not valid JSON")
+                continue
+            if not isinstance(measurements, dict):
+                continue
+            for name, value in measurements.items():
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+                if 0 < value <= MEASUREMENT_MAX and len(name) <= 30:
+                    rows.append((order_id, name, value))
+        if rows:
+            cursor.executemany("""
+                INSERT IGNORE INTO order_measurements (order_id, name, value) VALUES (%s, %s, %s)
+            """, rows)
+        last_id = orders[-1][0]
+
+def delete_zero_measurements(cursor, chunk=10000):
+    # Remove 0 (not taken) measurements from the hot and archive tables, a
+    # range of order ids at a time
+    for _, measurements in HISTORY_TABLES:
+        cursor.execute(f"SELECT COALESCE(MAX(order_id), 0) FROM {measurements}")
+        last_id = cursor.fetchone()[0]
+        for start in range(0, last_id, chunk):
+            cursor.execute(f"""
+                DELETE FROM {measurements}
+                WHERE order_id > %s AND order_id <= %s AND value = 0
+            """, (start, start + chunk))
+
+def backfill_order_customers(cursor, chunk=10000):
+    # Point every order at the customer with its contact, a range of ids at a
+    # time so no single statement locks the whole table
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM orders")
+    last_id = cursor.fetchone()[0]
+    for start in range(0, last_id, chunk):
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS settings (
-                id INT PRIMARY KEY,
-                shop_name VARCHAR(100) NOT NULL,
-                address TEXT NOT NULL,
-                phone VARCHAR(20) NOT NULL,
-                tax_rate DECIMAL(5, 2) NOT NULL
-            )
-        """)
+            UPDATE orders o JOIN customers c ON c.contact = o.contact
+            SET o.customer_id = c.id
+            WHERE o.id > %s AND o.id <= %s
+        """, (start, start + chunk))
+
+# Orders with their customer's name and contact:
+#   SELECT {ORDER_COLUMNS} FROM {ORDER_TABLES} WHERE ...
+ORDER_COLUMNS = """o.id, o.order_id, o.customer_id, c.name AS customer_name, c.contact,
+    o.garment_type, o.fabric, o.measurements, o.collar_type, o.sleeve_type, o.fit_type,
+    o.delivery_date, o.notes, o.price, o.status, o.delivered_at, o.created_at"""
+
+def order_tables(table="orders"):
+    # orders (or orders_archive) as o, joined to the customer as c
+    return f"{table} o JOIN customers c ON c.id = o.customer_id"
+
+ORDER_TABLES = order_tables()
+
+# History lookups read both the hot tables and the archive, as
+# (orders table, measurements table) pairs. Default views read only the first.
+HISTORY_TABLES = [("orders", "order_measurements"),
+                  ("orders_archive", "order_measurements_archive")]
+
+# Keeps delivered_at in step with status. MySQL applies single-table UPDATE
+# assignments left to right, so put this after the status assignment.
+DELIVERED_AT_SQL = "delivered_at = IF(status = 'Delivered', COALESCE(delivered_at, NOW()), NULL)"
+
+def schema_version(cursor):
+    # Highest applied migration (0 for a new database)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            description VARCHAR(200) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_steps (
+            version INT NOT NULL,
+            step INT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (version, step)
+        )
+    """)
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+def finished_steps(cursor, version):
+    # Steps of a migration already applied by an earlier, interrupted run
+    cursor.execute("SELECT step FROM schema_steps WHERE version = %s", (version,))
+    return {step for (step,) in cursor.fetchall()}
+
+def run_migrations():
+    # Bring the schema up to date; an up-to-date schema costs one query
+    latest = MIGRATIONS[-1][0]
+    try:
+        with db_cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+            if cursor.fetchone()[0] >= latest:
+                return True
+    except mysql.connector.errors.ProgrammingError:
+        pass    # No schema_version table yet
+    
+    try:
+        with db_cursor() as cursor:
+            # Only one terminal migrates at a time; the rest wait, then find nothing to do.
+            # GET_LOCK returns 1 once held, 0 on timeout and NULL on error.
+            for attempt in range(MIGRATION_LOCK_TRIES):
+                cursor.execute("SELECT GET_LOCK('omniflow_migrations', %s)", (MIGRATION_LOCK_WAIT_S,))
+                if cursor.fetchone()[0] == 1:
+                    break
+                print("Another terminal is migrating the database, waiting...")
+            else:
+                print("Migration in progress at another terminal; start again once it has finished")
+                return False
+            try:
+                current = schema_version(cursor)
+                for version, description, steps in MIGRATIONS:
+                    if version <= current:
+                        continue
+                    done = finished_steps(cursor, version)
+                    if done:
+                        print(f"Resuming migration {version}: {description}")
+                    else:
+                        print(f"Applying migration {version}: {description}")
+                    for number, step in enumerate(steps, 1):
+                        if number in done:
+                            continue
+                        if callable(step):
+                            step(cursor)
+                        else:
+                            cursor.execute(step)
+                        cursor.execute("INSERT INTO schema_steps (version, step) VALUES (%s, %s)",
+                                       (version, number))
+                    cursor.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                                   (version, description))
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK('omniflow_migrations')")
+                cursor.fetchone()
         
-        # Add default settings
-        cursor.execute("SELECT COUNT(*) FROM settings WHERE id = 1")
-        if cursor.fetchone()[0] == 0:
-            cursor.execute("""
-                INSERT INTO settings (id, shop_name, address, phone, tax_rate)
-                VALUES (1, 'StitchSync Tailors', '123 Fashion Street', '+91 9876543210', 5.00)
-            """)
-        
-        connection.commit()
-        cursor.close()
         print("Tables created!")
         return True
     except Exception as e:
-        print(f"Error: {e}")
+        print(f"Migration error: {e}")
         return False
 
 def run_query(query, values=None):
-    # Run any SQL query
-    global connection
+    # Run any SQL query (queries with values run as cached prepared statements)
+    # Read the flag once, so turning it on mid-query can't record a bogus time
+    timed = QUERY_STATS_ENABLED
+    started = time.perf_counter() if timed else 0
+    affected = 0
     try:
-        cursor = connection.cursor()
-        if values:
-            cursor.execute(query, values)
-        else:
-            cursor.execute(query)
-        connection.commit()
-        cursor.close()
+        if values and STATEMENT_CACHE_SIZE:
+            with db_connection() as conn:
+                affected = prepared_statement(conn, query, values).rowcount
+            return True
+        with db_cursor() as cursor:
+            if values:
+                cursor.execute(query, values)
+            else:
+                cursor.execute(query)
+            affected = cursor.rowcount
         return True
     except Exception as e:
+        if in_transaction():
+            raise
         print(f"Query error: {e}")
         return False
+    finally:
+        if timed:
+            record_query(query, time.perf_counter() - started, affected)
 
 def fetch_data(query, values=None):
     # Fetch data from database
-    global connection
+    timed = QUERY_STATS_ENABLED
+    started = time.perf_counter() if timed else 0
+    rows = []
     try:
-        cursor = connection.cursor(dictionary=True)
-        if values:
-            cursor.execute(query, values)
-        else:
-            cursor.execute(query)
-        result = cursor.fetchall()
-        cursor.close()
-        return result
+        for attempt in range(2):
+            try:
+                if values and STATEMENT_CACHE_SIZE:
+                    with db_connection() as conn:
+                        cursor = prepared_statement(conn, query, values)
+                        columns = cursor.column_names
+                        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                        return rows
+                with db_cursor(dictionary=True) as cursor:
+                    if values:
+                        cursor.execute(query, values)
+                    else:
+                        cursor.execute(query)
+                    rows = cursor.fetchall()
+                    return rows
+            except CONNECTION_ERRORS as e:
+                # Reads are safe to retry once on a fresh connection
+                if attempt == 0 and getattr(db_local, 'connection', None) is None:
+                    continue
+                if in_transaction():
+                    raise
+                print(f"Fetch error: {e}")
+                return []
+            except Exception as e:
+                if in_transaction():
+                    raise
+                print(f"Fetch error: {e}")
+                return []
+    finally:
+        if timed:
+            record_query(query, time.perf_counter() - started, len(rows))
+
+def execute_many(query, rows):
+    # Run query once for each tuple in rows. INSERT ... VALUES goes to the
+    # server as one multi-row statement; anything else reuses one prepared
+    # statement. Returns True/False like run_query.
+    if not rows:
+        return True
+    timed = QUERY_STATS_ENABLED
+    started = time.perf_counter() if timed else 0
+    try:
+        with db_connection() as conn:
+            if query.split(None, 1)[0].upper() in ("INSERT", "REPLACE") or not STATEMENT_CACHE_SIZE:
+                cursor = conn.cursor()
+                try:
+                    cursor.executemany(query, rows)
+                finally:
+                    cursor.close()
+            else:
+                for values in rows:
+                    prepared_statement(conn, query, values)
+        return True
     except Exception as e:
-        print(f"Fetch error: {e}")
-        return []
+        if in_transaction():
+            raise
+        print(f"Query error: {e}")
+        return False
+    finally:
+        if timed:
+            record_query(query, time.perf_counter() - started, len(rows))
 
 def fetch_one(query, values=None):
     # Fetch single row
@@ -171,10 +814,1165 @@ def fetch_one(query, values=None):
         return result[0]
     return None
 
+# Query Diagnostics
+# run_query, fetch_data and execute_many report each call here while
+# QUERY_STATS_ENABLED is on. With it off they skip even the clock reads.
+DB_LAYER_FUNCTIONS = {"record_query", "run_query", "fetch_data", "fetch_one", "execute_many"}
+
+@functools.lru_cache(maxsize=1024)
+def query_fingerprint(query):
+    # The query's shape: whitespace squeezed, literals and IN lists collapsed
+    text = " ".join(query.split())
+    text = re.sub(r"'(?:[^'\\]|\\.)*'", "?", text)
+    text = re.sub(r"\b\d+(?:\.\d+)?\b", "?", text)
+    text = text.replace("%s", "?")
+    return re.sub(r"IN \(\?(?:, \?)+\)", "IN (...)", text)
+
+def record_query(query, seconds, rows):
+    # Add one call to its fingerprint's stats; log it if slow
+    ms = seconds * 1000
+    key = query_fingerprint(query)
+    frame = sys._getframe(1)
+    while frame and frame.f_code.co_name in DB_LAYER_FUNCTIONS:
+        frame = frame.f_back
+    site = f"{frame.f_code.co_name}:{frame.f_lineno}" if frame else "?"
+    
+    with query_stats_lock:
+        stats = query_stats.get(key)
+        if stats is None:
+            stats = query_stats[key] = {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0,
+                                        'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                                        'sites': {}}
+        stats['calls'] += 1
+        stats['total_ms'] += ms
+        stats['max_ms'] = max(stats['max_ms'], ms)
+        stats['rows'] += max(rows, 0)
+        stats['histogram'][bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        stats['sites'][site] = stats['sites'].get(site, 0) + 1
+    
+    if ms >= SLOW_QUERY_MS:
+        with slow_log_lock:
+            with open(SLOW_QUERY_LOG, "a", encoding="utf-8") as f:
+                f.write(f"{datetime.now():%Y-%m-%d %H:%M:%S}\t{ms:.1f} ms\t{rows} rows\t"
+                        f"{site}\t{key}\n")
+
+def histogram_percentile(histogram, fraction):
+    # Bucket label holding the given fraction of calls, e.g. "<= 50 ms"
+    target = sum(histogram) * fraction
+    seen = 0
+    for i, count in enumerate(histogram):
+        seen += count
+        if seen >= target and i < len(LATENCY_BUCKETS_MS):
+            return f"<= {LATENCY_BUCKETS_MS[i]} ms"
+    return f"> {LATENCY_BUCKETS_MS[-1]} ms"
+
+def top_queries(limit=20):
+    # Copies of the fingerprints with the most total time
+    with query_stats_lock:
+        ranked = sorted(query_stats.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        return [(key, dict(stats, sites=dict(stats['sites']))) for key, stats in ranked[:limit]]
+
+def reset_diagnostics():
+    # Forget all query and page timings
+    with query_stats_lock:
+        query_stats.clear()
+    page_timings.clear()
+
+def start_page_timing(name):
+    # Time a page from begin_page until Tk is idle again (widgets built)
+    page_timing.update(name=name, started=time.perf_counter(), token=page_token, data_ms=None)
+    window.after_idle(finish_page_build, page_token)
+
+def finish_page_build(token):
+    # Record how long the page took to build
+    if token != page_token or token != page_timing.get('token'):
+        return
+    ms = (time.perf_counter() - page_timing['started']) * 1000
+    timing = page_timings.setdefault(page_timing['name'], {
+        'renders': 0, 'build_total_ms': 0.0, 'build_last_ms': 0.0, 'build_max_ms': 0.0,
+        'data_last_ms': None
+    })
+    timing['renders'] += 1
+    timing['build_total_ms'] += ms
+    timing['build_last_ms'] = ms
+    timing['build_max_ms'] = max(timing['build_max_ms'], ms)
+
+def note_page_data(token):
+    # Record when the page got its first background result
+    if token != page_timing.get('token') or page_timing['data_ms'] is not None:
+        return
+    page_timing['data_ms'] = (time.perf_counter() - page_timing['started']) * 1000
+    timing = page_timings.get(page_timing['name'])
+    if timing:
+        timing['data_last_ms'] = page_timing['data_ms']
+
+# Sequence Functions
+def next_sequence_value(name):
+    # Next number from a sequence. Numbers are reserved from the database in
+    # blocks, so most calls need no round trip; unused numbers in a block are
+    # skipped when the app closes.
+    with sequence_lock:
+        block = sequence_blocks.get(name)
+        if not block or block[0] >= block[1]:
+            block = reserve_sequence_block(name, SEQUENCE_BLOCK_SIZE)
+        value = block[0]
+        sequence_blocks[name] = [value + 1, block[1]]
+    return value
+
+def reserve_sequence_block(name, size):
+    # Claim [start, start + size) of a sequence in one atomic statement.
+    # LAST_INSERT_ID(expr) hands the new value back in the same round trip.
+    with db_cursor() as cursor:
+        cursor.execute(
+            "UPDATE sequences SET next_value = LAST_INSERT_ID(next_value + %s) WHERE name = %s",
+            (size, name)
+        )
+        if cursor.rowcount == 0:
+            raise ValueError(f"Unknown sequence: {name}")
+        end = cursor.lastrowid
+    return [end - size, end]
+
+# Daily Rollup Functions
+def rollup_add(day, garment_type, status, count, revenue):
+    # Add to one day/garment/status bucket (day None means today)
+    return run_query("""
+        INSERT INTO daily_rollups (day, garment_type, status, order_count, revenue)
+        VALUES (COALESCE(%s, CURDATE()), %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE order_count = order_count + VALUES(order_count),
+                                revenue = revenue + VALUES(revenue)
+    """, (day, garment_type, status, count, revenue))
+
+def revenue_between(start, end):
+    # Orders and revenue for days start..end inclusive, read from the rollups
+    row = fetch_one("""
+        SELECT CAST(COALESCE(SUM(order_count), 0) AS SIGNED) AS orders,
+               COALESCE(SUM(revenue), 0) AS revenue
+        FROM daily_rollups WHERE day BETWEEN %s AND %s
+    """, (start, end))
+    return row['orders'], row['revenue']
+
+# Customer Search Index
+def load_customer_index():
+    # Build the in-memory autocomplete index from the customers table
+    global customer_index, customers_by_id
+    rows = fetch_data("SELECT id, name, contact FROM customers")
+    by_id = {}
+    keys = []
+    for row in rows:
+        by_id[row['id']] = row
+        keys.extend((key, row['id']) for key in customer_search_keys(row))
+    keys.sort()
+    with customer_index_lock:
+        customer_index = keys
+        customers_by_id = by_id
+
+def customer_search_keys(customer):
+    # Prefixes a customer can be found by: full name, each name word, contact
+    name = customer['name'].lower()
+    keys = {name, customer['contact']}
+    keys.update(name.split())
+    return keys
+
+def index_customer(customer):
+    # Add or update one customer in the autocomplete index
+    if customers_by_id is None:
+        return
+    with customer_index_lock:
+        old = customers_by_id.get(customer['id'])
+        if old:
+            for key in customer_search_keys(old):
+                i = bisect.bisect_left(customer_index, (key, old['id']))
+                if i < len(customer_index) and customer_index[i] == (key, old['id']):
+                    del customer_index[i]
+        customers_by_id[customer['id']] = customer
+        for key in customer_search_keys(customer):
+            bisect.insort(customer_index, (key, customer['id']))
+
+def search_customer_index(typed, limit=SUGGESTION_LIMIT):
+    # Customers whose name, any name word or contact starts with typed.
+    # Returns None while the index hasn't been loaded yet.
+    if customers_by_id is None:
+        return None
+    prefix = typed.lower()
+    found = []
+    seen = set()
+    with customer_index_lock:
+        i = bisect.bisect_left(customer_index, (prefix,))
+        while i < len(customer_index) and len(found) < limit:
+            key, customer_id = customer_index[i]
+            if not key.startswith(prefix):
+                break
+            if customer_id not in seen:
+                seen.add(customer_id)
+                found.append(customers_by_id[customer_id])
+            i += 1
+    return found
+
+# Customer Stats Functions
+def stats_order_added(customer_id, price):
+    # Count a new order against its customer
+    return run_query("""
+        INSERT INTO customer_stats (customer_id, order_count, total_spent, last_order_at)
+        VALUES (%s, 1, %s, NOW())
+        ON DUPLICATE KEY UPDATE order_count = order_count + 1,
+                                total_spent = total_spent + VALUES(total_spent),
+                                last_order_at = VALUES(last_order_at)
+    """, (customer_id, price))
+
+def stats_price_changed(customer_id, old_price, new_price):
+    # Apply an order's price edit to its customer's spend
+    return run_query("""
+        UPDATE customer_stats SET total_spent = total_spent + %s
+        WHERE customer_id = %s
+    """, (float(new_price) - float(old_price), customer_id))
+
+# Measurement Functions
+def store_measurements(cursor, orders):
+    # Write the measurements of just-inserted orders, given as
+    # (orders.id, {name: value}) pairs, in one executemany. Measurements not
+    # taken (0) are left out, so searches and stats only see real ones.
+    rows = [(row_id, name, value)
+            for row_id, measurements in orders
+            for name, value in measurements.items() if value]
+    if rows:
+        cursor.executemany(
+            "INSERT INTO order_measurements (order_id, name, value) VALUES (%s, %s, %s)", rows
+        )
+
+def fetch_measurements(order_row_id):
+    # One order's measurements as {name: value}, standard ones first.
+    # Archived orders keep their id, so this finds theirs too.
+    rows = fetch_data(" UNION ALL ".join(
+        f"SELECT name, value FROM {measurements} WHERE order_id = %s"
+        for _, measurements in HISTORY_TABLES
+    ), (order_row_id,) * len(HISTORY_TABLES))
+    order = {key: i for i, key in enumerate(MEASUREMENT_KEYS)}
+    rows.sort(key=lambda row: (order.get(row['name'], len(order)), row['name']))
+    return {row['name']: float(row['value']) for row in rows}
+
+def find_orders_by_measurement(name, operator, value, garment_type=None, limit=100):
+    # Orders with a measurement compared to value, e.g. ("chest", ">", 44, "Blazer"),
+    # largest first, archived ones included. Each table is searched through
+    # its (name, value) index for its own top rows, then the two are merged.
+    if operator not in MEASUREMENT_OPERATORS:
+        raise ValueError(f"Unknown operator: {operator}")
+    condition = ""
+    values = [name, value]
+    if garment_type:
+        condition = " AND o.garment_type = %s"
+        values.append(garment_type)
+    values.append(limit)
+    query = " UNION ALL ".join(f"""
+        (SELECT {ORDER_COLUMNS}, m.value AS measurement
+         FROM {measurements} m JOIN {order_tables(orders)} ON o.id = m.order_id
+         WHERE m.name = %s AND m.value {operator} %s{condition}
+         ORDER BY m.value DESC, o.id DESC LIMIT %s)
+    """ for orders, measurements in HISTORY_TABLES)
+    query += " ORDER BY measurement DESC, id DESC LIMIT %s"
+    return fetch_data(query, tuple(values * len(HISTORY_TABLES) + [limit]))
+
+def measurement_stats(name=None, garment_type=None):
+    # Count, average, min and max per garment type and measurement, over all
+    # orders including archived ones
+    conditions = []
+    values = []
+    if name:
+        conditions.append("m.name = %s")
+        values.append(name)
+    if garment_type:
+        conditions.append("o.garment_type = %s")
+        values.append(garment_type)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    history = " UNION ALL ".join(f"""
+        SELECT o.garment_type, m.name, m.value
+        FROM {measurements} m JOIN {orders} o ON o.id = m.order_id
+        {where}
+    """ for orders, measurements in HISTORY_TABLES)
+    return fetch_data(f"""
+        SELECT garment_type, name, COUNT(*) AS orders, AVG(value) AS average,
+               MIN(value) AS smallest, MAX(value) AS largest
+        FROM ({history}) h
+        GROUP BY garment_type, name
+        ORDER BY garment_type, name
+    """, tuple(values * len(HISTORY_TABLES)))
+
+# Import Functions
+# Files are streamed, so memory stays flat however long they are. Rows are
+# written a batch at a time, each batch in one transaction with executemany.
+IMPORT_ORDER_COLUMNS = ["order_id", "customer_id", "garment_type", "fabric",
+                        "measurements", "collar_type", "sleeve_type", "fit_type",
+                        "delivery_date", "notes", "price", "status", "delivered_at",
+                        "created_at"]
+
+def read_import_rows(path):
+    # Yield (line number, row) from a CSV file with a header row, or a JSONL file
+    if path.lower().endswith((".jsonl", ".json")):
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError as e:
+                    yield line_no, {'_error': f"Bad JSON: {e}"}
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+
+def parse_import_row(row):
+    # Check one input row and return (customer, order). order is None for rows
+    # that only carry a customer. Raises ValueError saying what is wrong.
+    if not isinstance(row, dict):
+        raise ValueError("Row is not an object")
+    if '_error' in row:
+        raise ValueError(row['_error'])
+    
+    def text(key, limit=None, required=False):
+        value = row.get(key)
+        value = "" if value is None else str(value).strip()
+        if required and not value:
+            raise ValueError(f"Missing {key}")
+        if limit and len(value) > limit:
+            raise ValueError(f"{key} is longer than {limit} characters")
+        return value
+    
+    def number(key, value, limit=None):
+        try:
+            value = float(value) if value not in (None, "") else 0.0
+        except (TypeError, ValueError):
+            raise ValueError(f"{key} is not a number: {value!r}")
+        if not math.isfinite(value) or value < 0:
+            raise ValueError(f"{key} must be zero or more")
+        if limit and value > limit:
+            raise ValueError(f"{key} must be at most {limit}")
+        return value
+    
+    if not row.get('customer_name') and row.get('name'):
+        row = dict(row, customer_name=row['name'])
+    customer = {'name': text('customer_name', 100, True),
+                'contact': text('contact', 20, True)}
+    if not (text('order_id') or text('garment_type') or text('price')):
+        return customer, None
+    
+    # Measurements as one JSON object, or one column per measurement
+    measurements = row.get('measurements')
+    if measurements:
+        if isinstance(measurements, str):
+            try:
+                measurements = json.loads(measurements)
+            except ValueError:
+                raise ValueError("measurements is not valid JSON")
+        if not isinstance(measurements, dict):
+            raise ValueError("measurements must be an object")
+    else:
+        measurements = {key: row.get(key) for key in MEASUREMENT_KEYS}
+    for key in measurements:
+        if len(key) > 30:
+            raise ValueError(f"Measurement name is longer than 30 characters: {key}")
+    measurements = {key: number(key, value, MEASUREMENT_MAX) for key, value in measurements.items()}
+    
+    try:
+        delivery_date = date.fromisoformat(text('delivery_date', required=True))
+    except ValueError as e:
+        raise ValueError(f"delivery_date: {e}")
+    def timestamp(key):
+        # ISO date/time, or None if empty. The columns are DATETIME in local
+        # time, so values with a UTC offset are converted to local time.
+        value = text(key)
+        if not value:
+            return None
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError as e:
+            raise ValueError(f"{key}: {e}")
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value
+    
+    created_at = timestamp('created_at') or datetime.now()
+    
+    price = number('price', text('price', required=True))
+    if price >= 10 ** 8:
+        raise ValueError("price is too large")
+    status = text('status') or "Pending"
+    if status not in ORDER_STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+    delivered_at = None
+    if status == "Delivered":
+        # Without a delivered_at column, assume it went out on its delivery date
+        delivered_at = (timestamp('delivered_at') or
+                        max(created_at, datetime.combine(delivery_date, datetime.min.time())))
+    
+    order = {
+        'order_id': text('order_id', 20),
+        'contact': customer['contact'],
+        'garment_type': text('garment_type', 50, True),
+        'fabric': text('fabric', 50, True),
+        'measurements': json.dumps(measurements),
+        'measurement_values': measurements,
+        'collar_type': text('collar_type', 50),
+        'sleeve_type': text('sleeve_type', 50),
+        'fit_type': text('fit_type', 50),
+        'delivery_date': delivery_date,
+        'notes': text('notes'),
+        'price': round(price, 2),
+        'status': status,
+        'delivered_at': delivered_at,
+        'created_at': created_at,
+    }
+    return customer, order
+
+def import_file(path, batch_size=IMPORT_BATCH_SIZE, on_progress=None):
+    # Import customers and orders from a CSV or JSONL file. Customers are
+    # upserted by contact; orders without an order_id get one from the
+    # sequence. Rejected rows are written to <path>.rejected.jsonl with the
+    # reason. on_progress(rows read) is called from this thread after each batch.
+    result = {'rows': 0, 'customers': 0, 'orders': 0, 'rejected': 0, 'rejects_file': None}
+    rejects = None
+    
+    def reject(line_no, reason, row):
+        nonlocal rejects
+        if rejects is None:
+            result['rejects_file'] = path + ".rejected.jsonl"
+            rejects = open(result['rejects_file'], "w", encoding="utf-8")
+        rejects.write(json.dumps({'line': line_no, 'reason': reason, 'row': row},
+                                 default=str) + "\n")
+        result['rejected'] += 1
+    
+    batch = []
+    try:
+        for line_no, row in read_import_rows(path):
+            result['rows'] += 1
+            try:
+                customer, order = parse_import_row(row)
+            except ValueError as e:
+                reject(line_no, str(e), row)
+                continue
+            batch.append((line_no, row, customer, order))
+            if len(batch) >= batch_size:
+                import_batch(batch, result, reject)
+                batch = []
+                if on_progress:
+                    on_progress(result['rows'])
+        if batch:
+            import_batch(batch, result, reject)
+            if on_progress:
+                on_progress(result['rows'])
+    finally:
+        if rejects:
+            rejects.close()
+    
+    if result['orders']:
+        invalidate_dashboard_cache()
+    if customers_by_id is not None:
+        load_customer_index()
+    return result
+
+def import_batch(batch, result, reject):
+    # Write one batch in a single transaction. If the database refuses the
+    # batch, retry its rows one by one so only the bad rows are rejected.
+    orders = [order for _, _, _, order in batch if order]
+    missing = [order for order in orders if not order['order_id']]
+    if missing:
+        start, _ = reserve_sequence_block('order', len(missing))
+        for n, order in enumerate(missing, start):
+            order['order_id'] = f"ORD{n:05d}"
+    
+    try:
+        with transaction() as cursor:
+            imported = write_import_batch(cursor, batch, reject)
+            # Other terminals reload rather than fetch a whole batch row by row
+            log_changes("import", "insert", [0], cursor)
+    except CONNECTION_ERRORS:
+        raise
+    except mysql.connector.Error as e:
+        if len(batch) == 1:
+            line_no, row, _, _ = batch[0]
+            reject(line_no, str(e), row)
+            return
+        for item in batch:
+            import_batch([item], result, reject)
+        return
+    result['customers'] += imported[0]
+    result['orders'] += imported[1]
+
+def write_import_batch(cursor, batch, reject):
+    # Upsert the batch's customers, insert its orders and add them to the
+    # customer stats and daily rollups. Returns (customers, orders) written.
+    customers = {}
+    for _, _, customer, _ in batch:
+        customers[customer['contact']] = customer['name']
+    cursor.executemany("""
+        INSERT INTO customers (name, contact) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE name = VALUES(name)
+    """, [(name, contact) for contact, name in customers.items()])
+    
+    # Skip orders already stored (archived ones too), or repeated within the file
+    orders = [(line_no, row, order) for line_no, row, _, order in batch if order]
+    if not orders:
+        return len(customers), 0
+    placeholders = ", ".join(["%s"] * len(customers))
+    cursor.execute(f"SELECT id, contact FROM customers WHERE contact IN ({placeholders})",
+                   tuple(customers))
+    customer_ids = {contact: customer_id for customer_id, contact in cursor.fetchall()}
+    placeholders = ", ".join(["%s"] * len(orders))
+    cursor.execute(" UNION ALL ".join(
+        f"SELECT order_id FROM {table} WHERE order_id IN ({placeholders})"
+        for table, _ in HISTORY_TABLES
+    ), tuple(order['order_id'] for _, _, order in orders) * len(HISTORY_TABLES))
+    seen = {order_id for (order_id,) in cursor.fetchall()}
+    new_orders = []
+    for line_no, row, order in orders:
+        if order['order_id'] in seen:
+            reject(line_no, f"Duplicate order_id: {order['order_id']}", row)
+            continue
+        seen.add(order['order_id'])
+        order['customer_id'] = customer_ids[order['contact']]
+        new_orders.append(order)
+    if not new_orders:
+        return len(customers), 0
+    
+    cursor.executemany(f"""
+        INSERT INTO orders ({', '.join(IMPORT_ORDER_COLUMNS)})
+        VALUES ({', '.join(['%s'] * len(IMPORT_ORDER_COLUMNS))})
+    """, [tuple(order[column] for column in IMPORT_ORDER_COLUMNS) for order in new_orders])
+    placeholders = ", ".join(["%s"] * len(new_orders))
+    cursor.execute(f"SELECT order_id, id FROM orders WHERE order_id IN ({placeholders})",
+                   tuple(order['order_id'] for order in new_orders))
+    row_ids = dict(cursor.fetchall())
+    store_measurements(cursor, [(row_ids[order['order_id']], order['measurement_values'])
+                                for order in new_orders])
+    
+    # Keep the order sequence ahead of imported order numbers
+    numbers = [int(order['order_id'][3:]) for order in new_orders
+               if order['order_id'].startswith("ORD") and order['order_id'][3:].isdigit()]
+    if numbers:
+        cursor.execute("UPDATE sequences SET next_value = GREATEST(next_value, %s) WHERE name = 'order'",
+                       (max(numbers) + 1,))
+    
+    # Customer stats and daily rollups, summed per customer and per bucket
+    stats = {}
+    rollups = {}
+    for order in new_orders:
+        count, spent, last = stats.get(order['customer_id'], (0, 0.0, order['created_at']))
+        stats[order['customer_id']] = (count + 1, spent + order['price'],
+                                       max(last, order['created_at']))
+        key = (order['created_at'].date(), order['garment_type'], order['status'])
+        count, revenue = rollups.get(key, (0, 0.0))
+        rollups[key] = (count + 1, revenue + order['price'])
+    
+    cursor.executemany("""
+        INSERT INTO customer_stats (customer_id, order_count, total_spent, last_order_at)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE order_count = order_count + VALUES(order_count),
+                                total_spent = total_spent + VALUES(total_spent),
+                                last_order_at = GREATEST(COALESCE(last_order_at, VALUES(last_order_at)),
+                                                         VALUES(last_order_at))
+    """, [(customer_id, count, round(spent, 2), last)
+          for customer_id, (count, spent, last) in stats.items()])
+    cursor.executemany("""
+        INSERT INTO daily_rollups (day, garment_type, status, order_count, revenue)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE order_count = order_count + VALUES(order_count),
+                                revenue = revenue + VALUES(revenue)
+    """, [(day, garment, status, count, round(revenue, 2))
+          for (day, garment, status), (count, revenue) in rollups.items()])
+    return len(customers), len(new_orders)
+
+# Export Functions
+# Exports read from an unbuffered cursor a chunk at a time, so memory stays
+# flat however big the table is. They use a connection of their own rather
+# than one from the pool, since a long export can hold it for minutes.
+def export_query(table, start=None, end=None, status="All"):
+    # SQL and values for one table's export, oldest first
+    conditions = []
+    values = []
+    if table in ("orders", "orders_archive"):
+        query = f"SELECT {ORDER_COLUMNS} FROM {order_tables(table)}"
+        date_column = "o.created_at"
+        order_by = "ORDER BY o.created_at, o.id"
+        if status != "All":
+            conditions.append("o.status = %s")
+            values.append(status)
+    elif table == "customers":
+        query = """
+            SELECT c.id, c.name, c.contact, c.created_at,
+                   COALESCE(s.order_count, 0) AS order_count,
+                   COALESCE(s.total_spent, 0) AS total_spent, s.last_order_at
+            FROM customers c LEFT JOIN customer_stats s ON s.customer_id = c.id
+        """
+        date_column = "c.created_at"
+        order_by = "ORDER BY c.created_at, c.id"
+    else:
+        raise ValueError(f"Unknown table: {table}")
+    
+    if start:
+        conditions.append(f"{date_column} >= %s")
+        values.append(start)
+    if end:
+        conditions.append(f"{date_column} < %s")
+        values.append(end + timedelta(days=1))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"{query} {where} {order_by}", tuple(values)
+
+def export_format(path):
+    # Guess the format from the file name (.cols.gz, .jsonl[.gz], else CSV)
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    if name.endswith(".cols"):
+        return "columns"
+    if name.endswith((".jsonl", ".json")):
+        return "jsonl"
+    return "csv"
+
+def json_value(value):
+    # json.dumps default= for the column types MySQL hands back
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+def export_table(table, path, fmt=None, start=None, end=None, status="All", on_progress=None):
+    # Stream a table to CSV, JSONL or "columns": gzipped JSON lines, a header
+    # line naming the columns, then one {"rows", "columns": {name: [values]}}
+    # block per chunk. Files ending in .gz are compressed. The file only
+    # appears once the export has finished. Returns the number of rows.
+    # on_progress(rows written) is called from this thread after each chunk.
+    fmt = fmt or export_format(path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    query, values = export_query(table, start, end, status)
+    opener = gzip.open if fmt == "columns" or path.lower().endswith(".gz") else open
+    part = path + ".part"
+    count = 0
+    
+    conn = open_connection()
+    try:
+        with opener(part, "wt", encoding="utf-8", newline="") as f:
+            cursor = conn.cursor()  # Unbuffered: rows stay on the server until fetched
+            cursor.execute(query, values)
+            columns = list(cursor.column_names)
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(columns)
+            elif fmt == "columns":
+                f.write(json.dumps({'format': 'omniflow-columns', 'version': 1,
+                                    'table': table, 'columns': columns}) + "\n")
+            
+            while True:
+                rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                if not rows:
+                    break
+                if fmt == "csv":
+                    writer.writerows(rows)
+                elif fmt == "jsonl":
+                    f.writelines(json.dumps(dict(zip(columns, row)), default=json_value) + "\n"
+                                 for row in rows)
+                else:
+                    block = dict(zip(columns, map(list, zip(*rows))))
+                    f.write(json.dumps({'rows': len(rows), 'columns': block},
+                                       default=json_value) + "\n")
+                count += len(rows)
+                if on_progress:
+                    on_progress(count)
+        os.replace(part, path)
+    except Exception:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    finally:
+        conn.close()
+    return count
+
+# Archive Functions
+# Orders delivered more than ARCHIVE_AFTER_DAYS ago move to orders_archive
+# (their measurements to order_measurements_archive), a batch per
+# transaction, so the lists and indexes of the hot tables stay small.
+# They keep their id, and their rollups and customer stats are unchanged.
+def archive_delivered_orders(days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    # Move one batch of old delivered orders. Returns the number moved.
+    with transaction() as cursor:
+        cursor.execute("""
+            SELECT id FROM orders
+            WHERE status = 'Delivered' AND delivered_at < NOW() - INTERVAL %s DAY
+            ORDER BY delivered_at, id LIMIT %s FOR UPDATE
+        """, (days, batch_size))
+        order_ids = tuple(order_id for (order_id,) in cursor.fetchall())
+        if not order_ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(order_ids))
+        cursor.execute(f"INSERT INTO orders_archive SELECT * FROM orders WHERE id IN ({placeholders})",
+                       order_ids)
+        cursor.execute(f"""
+            INSERT INTO order_measurements_archive
+            SELECT * FROM order_measurements WHERE order_id IN ({placeholders})
+        """, order_ids)
+        # Measurements go with their orders (ON DELETE CASCADE)
+        cursor.execute(f"DELETE FROM orders WHERE id IN ({placeholders})", order_ids)
+        log_changes("order", "archive", order_ids, cursor)
+    # Nothing on the dashboard changes, but cached order lists must reload
+    invalidate_dashboard_cache()
+    return len(order_ids)
+
+def archive_in_background():
+    # Archive one batch on a query worker, then schedule the next run: soon
+    # while there is a backlog, otherwise after ARCHIVE_INTERVAL_MS
+    def job():
+        try:
+            prune_change_log()
+            moved = archive_delivered_orders()
+        except Exception as e:
+            print(f"Archive error: {e}")
+            moved = 0
+        delay = ARCHIVE_BATCH_GAP_MS if moved == ARCHIVE_BATCH_SIZE else ARCHIVE_INTERVAL_MS
+        ui_results.put((window.after, (delay, archive_in_background)))
+    
+    db_executor.submit(job)
+
+# Change Feed
+# Every order, customer and settings write adds a change_log entry in the
+# same transaction. Each terminal polls for entries after the last id it
+# has handled, re-reads just the changed rows and hands them to the open
+# page, the dashboard cache, the settings cache and the autocomplete index.
+def log_changes(entity, action, entity_ids, cursor):
+    # Record changes for the other terminals, on the cursor of the
+    # transaction that made them so both commit or neither does
+    rows = [(entity, entity_id, action, TERMINAL_ID) for entity_id in entity_ids]
+    if rows:
+        cursor.executemany("""
+            INSERT INTO change_log (entity, entity_id, action, terminal) VALUES (%s, %s, %s, %s)
+        """, rows)
+
+def read_changes():
+    # New change_log entries from other terminals. Ids are handed out when a
+    # transaction writes but become visible when it commits, so an id missing
+    # between seen ones may still turn up; the cursor waits for it up to
+    # CHANGE_GAP_WAIT_S before deciding it was rolled back.
+    feed = change_feed
+    rows = fetch_data("""
+        SELECT id, entity, entity_id, action, terminal FROM change_log
+        WHERE id > %s ORDER BY id LIMIT %s
+    """, (feed['after'], CHANGE_POLL_LIMIT))
+    entries = [row for row in rows if row['id'] not in feed['seen']]
+    feed['seen'].update(row['id'] for row in entries)
+    
+    now = time.monotonic()
+    if feed['seen']:
+        for missing in range(feed['after'] + 1, max(feed['seen'])):
+            if missing not in feed['seen']:
+                feed['gaps'].setdefault(missing, now)
+    while feed['seen']:
+        next_id = feed['after'] + 1
+        if next_id in feed['seen']:
+            feed['seen'].discard(next_id)
+        elif now - feed['gaps'].get(next_id, now) < CHANGE_GAP_WAIT_S:
+            break
+        feed['gaps'].pop(next_id, None)
+        feed['after'] = next_id
+    # Pages already show this terminal's own edits, but not what its
+    # background archiving moved out
+    return [row for row in entries
+            if row['terminal'] != TERMINAL_ID or row['action'] == "archive"]
+
+def load_changes(entries):
+    # Turn entries into a delta for the open page: the current rows of changed
+    # orders and customers, ids of orders gone from the hot table, and flags
+    # for settings and imports. The caches are brought up to date here too.
+    def ids(entity, *actions):
+        return {e['entity_id'] for e in entries if e['entity'] == entity and e['action'] in actions}
+    
+    removed = ids("order", "delete", "archive")
+    order_ids = ids("order", "insert", "update") - removed
+    customer_ids = ids("customer", "update")
+    delta = {'orders': [], 'removed_orders': removed, 'customers': [],
+             'settings': bool(ids("settings", "update")),
+             'reload': bool(ids("import", "insert"))}
+    
+    if order_ids:
+        placeholders = ", ".join(["%s"] * len(order_ids))
+        delta['orders'] = fetch_data(f"SELECT {ORDER_COLUMNS} FROM {ORDER_TABLES} "
+                                     f"WHERE o.id IN ({placeholders})", tuple(order_ids))
+        # Gone again (deleted or archived) before we got to read them
+        delta['removed_orders'] |= order_ids - {order['id'] for order in delta['orders']}
+    if customer_ids:
+        placeholders = ", ".join(["%s"] * len(customer_ids))
+        delta['customers'] = fetch_data(f"""
+            SELECT c.*, COALESCE(s.order_count, 0) AS order_count,
+                   COALESCE(s.total_spent, 0) AS spent, s.last_order_at
+            FROM customers c LEFT JOIN customer_stats s ON s.customer_id = c.id
+            WHERE c.id IN ({placeholders})
+        """, tuple(customer_ids))
+        for customer in delta['customers']:
+            index_customer({'id': customer['id'], 'name': customer['name'],
+                            'contact': customer['contact']})
+    
+    if order_ids or removed or delta['reload']:
+        invalidate_dashboard_cache()
+    if delta['settings']:
+        invalidate_shop_settings()
+    if delta['reload']:
+        load_customer_index()
+    return delta
+
+def apply_changes(delta):
+    # Tk thread: let the open page patch itself
+    page = pages.get(current_page)
+    if page and page['on_changes']:
+        page['on_changes'](delta)
+
+def poll_change_feed():
+    # One poll on a query worker; the next is scheduled when it's done, so
+    # polls never pile up behind a slow server
+    def job():
+        try:
+            if change_feed['after'] is None:
+                # Start from now; pages load everything older themselves
+                row = fetch_one("SELECT COALESCE(MAX(id), 0) AS last_id FROM change_log")
+                if row:
+                    change_feed['after'] = row['last_id']
+            else:
+                entries = read_changes()
+                if entries:
+                    ui_results.put((apply_changes, (load_changes(entries),)))
+        except Exception as e:
+            print(f"Change feed error: {e}")
+        ui_results.put((window.after, (CHANGE_POLL_MS, poll_change_feed)))
+    
+    db_executor.submit(job)
+
+def start_change_feed():
+    # Called at login; one feed runs for the rest of the session
+    if not change_feed['running']:
+        change_feed['running'] = True
+        poll_change_feed()
+
+def prune_change_log():
+    # Entries are only needed until every terminal has polled them
+    return run_query("DELETE FROM change_log WHERE created_at < NOW() - INTERVAL %s DAY",
+                     (CHANGE_LOG_KEEP_DAYS,))
+
+# Background Query Functions
+def start_background_workers():
+    # Start the query worker threads and the loop that hands results to Tk
+    global db_executor
+    db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+    window.after(UI_POLL_MS, pump_ui_results)
+
+def stop_background_workers():
+    # Stop the query workers without waiting for running queries
+    if db_executor:
+        db_executor.shutdown(wait=False, cancel_futures=True)
+
+def pump_ui_results():
+    # Deliver finished background work on the Tk thread (Tk is not thread-safe)
+    try:
+        while True:
+            callback, args = ui_results.get_nowait()
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"UI callback error: {e}")
+    except queue.Empty:
+        pass
+    window.after(UI_POLL_MS, pump_ui_results)
+
+def run_in_background(work, on_done=None, on_error=None, cancellable=True,
+                      page_bound=True):
+    # Run work() on a worker thread, then on_done(result) on the Tk thread.
+    # Results that arrive after the user switched pages are dropped, and
+    # cancellable jobs that haven't started yet are cancelled on the switch.
+    # Dialogs and writes outlive page switches, so their jobs pass
+    # cancellable=False, page_bound=False to always get their result (the
+    # callbacks only touch their dialog or the cached page's widgets).
+    token = page_token
+
+    def deliver(callback, value):
+        if token == page_token:
+            callback(value)
+            if QUERY_STATS_ENABLED:
+                note_page_data(token)
+        elif not page_bound:
+            callback(value)
+
+    def job():
+        try:
+            result = work()
+        except Exception as e:
+            print(f"Background error: {e}")
+            if on_error:
+                ui_results.put((deliver, (on_error, e)))
+            return
+        if on_done:
+            ui_results.put((deliver, (on_done, result)))
+
+    future = db_executor.submit(job)
+    if cancellable:
+        pending_jobs[:] = [f for f in pending_jobs if not f.done()]
+        pending_jobs.append(future)
+    return future
+
+def cancel_page_jobs():
+    # Forget the current page's background work
+    global page_token
+    page_token += 1
+    for future in pending_jobs:
+        future.cancel()
+    pending_jobs.clear()
+
+def begin_page(name, cache=True):
+    # Switch the main area to the named page. A page built earlier is shown
+    # again, its refresh() is run and None is returned. Otherwise (or with
+    # cache=False) an empty frame is returned for the caller to build into.
+    global current_page
+    cancel_page_jobs()
+    if QUERY_STATS_ENABLED:
+        start_page_timing(name)
+    if current_page in pages:
+        pages[current_page]['frame'].pack_forget()
+    current_page = name
+    
+    page = pages.get(name)
+    if page is not None and cache:
+        page['frame'].pack(fill="both", expand=True)
+        if page['refresh']:
+            page['refresh']()
+        return None
+    if page is not None:
+        page['frame'].destroy()
+    
+    frame = ctk.CTkFrame(main_area, fg_color="transparent")
+    frame.pack(fill="both", expand=True)
+    pages[name] = {'frame': frame, 'refresh': None, 'on_changes': None}
+    return frame
+
+def show_loading(parent, text="Loading..."):
+    # Placeholder shown while a page's data loads
+    label = ctk.CTkLabel(parent, text=text, font=("Helvetica", 16))
+    label.pack(pady=50)
+    return label
+
+# Virtual List
+class VirtualList:
+    # Scrolling list that only builds widgets for the rows on screen plus a
+    # small buffer, and reuses them as the user scrolls.
+    # make_row(frame) fills a fixed-height frame with widgets and returns them
+    # in a dict; fill_row(widgets, row) points those widgets at a data row.
+    # load_more() is called when the user scrolls close to the last loaded row.
+    # key(row) identifies a row, so a slot already showing that row is kept
+    # as-is when the list scrolls or rows are patched in place.
+
+    def __init__(self, parent, row_height, make_row, fill_row,
+                 load_more=None, empty_text="Nothing found", key=None):
+        self.row_height = row_height
+        self.make_row = make_row
+        self.fill_row = fill_row
+        self.load_more = load_more
+        self.empty_text = empty_text
+        self.key = key or id
+        self.rows = []
+        self.positions = {}     # key(row) -> index in self.rows
+        self.has_more = False
+        self.loading = False
+        self.top = 0            # Index of the first row on screen
+        self.visible = 1        # Rows that fit on screen
+        self.slots = []         # Reusable row widgets
+        
+        self.frame = ctk.CTkFrame(parent)
+        self.body = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.body.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.message = ctk.CTkLabel(self.body, text=empty_text, font=("Helvetica", 16))
+        
+        tkinter.Misc.bind(self.body, "<Configure>", lambda e: self.render(), "+")
+        self.bind_wheel(self.body)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def bind_wheel(self, widget):
+        # Scroll from anywhere over the list, including inside row widgets
+        tkinter.Misc.bind(widget, "<MouseWheel>", self.on_wheel, "+")
+        tkinter.Misc.bind(widget, "<Button-4>", lambda e: self.scroll_to(self.top - 1), "+")
+        tkinter.Misc.bind(widget, "<Button-5>", lambda e: self.scroll_to(self.top + 1), "+")
+        for child in widget.winfo_children():
+            self.bind_wheel(child)
+
+    def on_wheel(self, event):
+        self.scroll_to(self.top - 1 if event.delta > 0 else self.top + 1)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.rows)))
+        else:
+            step = int(float(amount))
+            if unit == "pages":
+                step *= self.visible
+            self.scroll_to(self.top + step)
+
+    def scroll_to(self, index):
+        if index != self.top:
+            self.top = index
+            self.render()
+
+    def add_slot(self):
+        frame = ctk.CTkFrame(self.body, height=self.row_height, fg_color="transparent")
+        frame.pack_propagate(False)
+        slot = self.make_row(frame)
+        slot['frame'] = frame
+        slot['row'] = None
+        self.bind_wheel(frame)
+        self.slots.append(slot)
+
+    def index_rows(self, start=0):
+        for index in range(start, len(self.rows)):
+            self.positions[self.key(self.rows[index])] = index
+
+    def clear(self, text=None):
+        # Drop all rows, optionally showing a message such as "Loading..."
+        self.rows = []
+        self.positions = {}
+        self.has_more = False
+        self.loading = False
+        self.top = 0
+        self.render(text)
+
+    def set_rows(self, rows, has_more=False):
+        self.rows = list(rows)
+        self.positions = {}
+        self.index_rows()
+        self.has_more = has_more
+        self.loading = False
+        self.top = 0
+        self.render()
+
+    def append_rows(self, rows, has_more=False):
+        start = len(self.rows)
+        self.rows.extend(rows)
+        self.index_rows(start)
+        self.has_more = has_more
+        self.loading = False
+        self.render()
+
+    def get_row(self, key):
+        index = self.positions.get(key)
+        return None if index is None else self.rows[index]
+
+    def update_rows(self, rows):
+        # Replace the rows with the same keys; only their slots are refilled
+        for row in rows:
+            index = self.positions.get(self.key(row))
+            if index is not None:
+                self.rows[index] = row
+        self.render()
+
+    def remove_rows(self, keys):
+        # Drop rows; the slots below them move up without being rebuilt
+        gone = {self.positions.pop(key) for key in keys if key in self.positions}
+        if gone:
+            self.rows = [row for index, row in enumerate(self.rows) if index not in gone]
+            self.index_rows(min(gone))
+            self.render()
+
+    def insert_rows(self, rows, sort_key):
+        # Merge in new rows, keeping the list sorted by sort_key (largest
+        # first). A scrolled list stays on the rows it was showing.
+        anchor = self.rows[self.top] if 0 < self.top < len(self.rows) else None
+        self.rows.extend(rows)
+        self.rows.sort(key=sort_key, reverse=True)
+        self.positions = {}
+        self.index_rows()
+        if anchor is not None:
+            self.top = self.positions[self.key(anchor)]
+        self.render()
+
+    def update_row(self, row):
+        self.update_rows([row])
+
+    def remove_row(self, key):
+        self.remove_rows([key])
+
+    def resume(self):
+        # Called when a cached page is shown again
+        self.loading = False
+        self.render()
+
+    def render(self, text=None, force=False):
+        # Point the row widgets at the rows currently on screen
+        row_px = self.row_height * ctk.ScalingTracker.get_widget_scaling(self.body)
+        height = max(self.body.winfo_height(), 1)
+        self.visible = max(1, int(height // row_px))
+        shown = math.ceil(height / row_px)
+        while len(self.slots) < shown + VIRTUAL_LIST_BUFFER:
+            self.add_slot()
+        
+        self.top = max(0, min(self.top, len(self.rows) - self.visible))
+        wanted = self.rows[self.top:self.top + shown]
+        wanted_keys = {self.key(row) for row in wanted}
+        
+        # Slots already showing a wanted row stay with it; the rest are free
+        by_key = {}
+        free = []
+        for slot in self.slots:
+            if slot['row'] is not None and self.key(slot['row']) in wanted_keys \
+                    and self.key(slot['row']) not in by_key:
+                by_key[self.key(slot['row'])] = slot
+            else:
+                free.append(slot)
+        
+        for i, row in enumerate(wanted):
+            slot = by_key.pop(self.key(row), None) or free.pop()
+            if force or slot['row'] is not row:
+                slot['row'] = row
+                self.fill_row(slot, row)
+            slot['frame'].place(x=0, y=i * self.row_height, relwidth=1)
+        for slot in free:
+            slot['frame'].place_forget()
+        
+        if self.rows:
+            self.message.place_forget()
+        else:
+            self.message.configure(text=text or self.empty_text)
+            self.message.place(relx=0.5, y=50, anchor="n")
+        
+        if self.rows:
+            self.scrollbar.set(self.top / len(self.rows),
+                               min(1.0, (self.top + self.visible) / len(self.rows)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        
+        # Fetch the next page before the user reaches the end
+        near_end = self.top + shown >= len(self.rows) - VIRTUAL_LIST_PREFETCH
+        if self.rows and self.load_more and self.has_more and not self.loading and near_end:
+            self.loading = True
+            self.load_more()
+
+# Startup Functions
+def preload_heavy_modules():
+    # Import the dashboard/PDF libraries on a background thread so the
+    # first dashboard visit or PDF doesn't pay for them
+    def preload():
+        for name in HEAVY_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                print(f"Preload error: {e}")
+    
+    threading.Thread(target=preload, name="preload", daemon=True).start()
+
 # Clear screen function
 def clear_screen():
     # Remove all widgets
-    global window
+    global window, current_page
+    cancel_page_jobs()
+    pages.clear()
+    current_page = None
     for widget in window.winfo_children():
         widget.destroy()
 
@@ -254,6 +2052,13 @@ def show_main_page():
                        font=("Helvetica", 26, "bold"))
     logo.pack(pady=15)
     
+    # Load customers for autocomplete and the shop settings while the dashboard opens
+    run_in_background(load_customer_index, cancellable=False)
+    run_in_background(get_shop_settings, cancellable=False)
+    
+    # Pick up what other terminals change from now on
+    start_change_feed()
+    
     # User info
     user_label = ctk.CTkLabel(sidebar, text=f"Logged in as: {logged_in_user}", 
                              font=("Helvetica", 13, "bold"))
@@ -285,6 +2090,11 @@ def show_main_page():
                                 command=show_settings_page)
     settings_btn.pack(pady=8, padx=20)
     
+    diagnostics_btn = ctk.CTkButton(sidebar, text="🩺 Diagnostics", 
+                                   width=240, height=50,
+                                   command=show_diagnostics_page)
+    diagnostics_btn.pack(pady=8, padx=20)
+    
     # Logout button
     logout_btn = ctk.CTkButton(sidebar, text="'🚪 Logout", 
                               width=240, height=50,
@@ -300,104 +2110,293 @@ def show_main_page():
     show_dashboard_page()
 
 # Dashboard Page
-def show_dashboard_page():
-    global main_area
-    # Clear main area
-    for widget in main_area.winfo_children():
-        widget.destroy()
+def load_dashboard_data():
+    # Dashboard numbers from the daily rollups (one pass for the counts, one
+    # range each for month and week revenue), cached until an order changes
+    global dashboard_cache
+    with dashboard_cache_lock:
+        if dashboard_cache is not None and dashboard_cache['day'] == date.today():
+            return dashboard_cache
+        version = dashboard_version
     
-    # Title
-    title = ctk.CTkLabel(main_area, text="📊 Dashboard", 
-                        font=("Helvetica", 32, "bold"))
-    title.pack(pady=20, padx=30, anchor="w")
+    rows = fetch_data("""
+        SELECT garment_type, status, CAST(SUM(order_count) AS SIGNED) AS count
+        FROM daily_rollups GROUP BY garment_type, status
+    """)
     
-    # Stats frame
-    stats_frame = ctk.CTkFrame(main_area)
-    stats_frame.pack(fill="x", padx=30, pady=20)
+    today = date.today()
+    _, month_revenue = revenue_between(today.replace(day=1), today)
+    _, week_revenue = revenue_between(today - timedelta(days=today.weekday()), today)
     
-    # Get statistics
-    total_orders = fetch_one("SELECT COUNT(*) as count FROM orders")['count']
-    pending_orders = fetch_one("SELECT COUNT(*) as count FROM orders WHERE status = 'Pending'")['count']
+    total_orders = 0
+    pending_orders = 0
+    garments = {}
+    statuses = {}
+    for row in rows:
+        if not row['count']:
+            continue
+        total_orders += row['count']
+        if row['status'] == 'Pending':
+            pending_orders += row['count']
+        garments[row['garment_type']] = garments.get(row['garment_type'], 0) + row['count']
+        statuses[row['status']] = statuses.get(row['status'], 0) + row['count']
     
-    # Monthly revenue
-    current_month = datetime.now().strftime("%Y-%m")
-    revenue_data = fetch_one(
-        "SELECT SUM(price) as total FROM orders"
-    )
-    revenue = revenue_data['total'] if revenue_data['total'] else 0
+    data = {
+        'day': today,
+        'total_orders': total_orders,
+        'pending_orders': pending_orders,
+        'month_revenue': month_revenue,
+        'week_revenue': week_revenue,
+        'garment_data': [{'garment_type': g, 'count': c} for g, c in sorted(garments.items())],
+        'status_data': [{'status': st, 'count': c} for st, c in sorted(statuses.items())]
+    }
     
-    # Create stat cards
-    stats = [
-        ("📦 Total Orders", total_orders, "#3b8ed0"),
-        ("⏳ Pending", pending_orders, "#ca5010"),
-        ("💰 Revenue", f"₹{revenue:.2f}", "#107c10")
+    # Don't cache numbers an order write has made stale while we were counting
+    with dashboard_cache_lock:
+        if version == dashboard_version:
+            dashboard_cache = data
+    return data
+
+def invalidate_dashboard_cache():
+    # Called by every order write so the next dashboard visit recounts
+    global dashboard_cache, dashboard_version
+    with dashboard_cache_lock:
+        dashboard_cache = None
+        dashboard_version += 1
+
+def chart_key(data):
+    # What the dashboard charts show; an unchanged key means no redraw
+    return (tuple((row['garment_type'], row['count']) for row in data['garment_data']),
+            tuple((row['status'], row['count']) for row in data['status_data']))
+
+def render_dashboard_chart(data):
+    # Update the session's one dashboard figure in place and return it as an image.
+    # Uses a plain Agg canvas, so it is safe to call from a worker thread.
+    global dashboard_figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from PIL import Image
+    
+    key = chart_key(data)
+    with dashboard_chart_lock:
+        if dashboard_chart.get('key') == key:
+            return dashboard_chart['image']
+        
+        if dashboard_figure is None:
+            dashboard_figure = Figure(figsize=(12, 5), facecolor='#2b2b2b')
+            FigureCanvasAgg(dashboard_figure)
+            dashboard_chart['pie_ax'] = dashboard_figure.add_subplot(121)
+            dashboard_chart['bar_ax'] = dashboard_figure.add_subplot(122)
+        
+        update_garment_pie(data['garment_data'])
+        update_status_bars(data['status_data'])
+        
+        canvas = dashboard_figure.canvas
+        canvas.draw()
+        width, height = canvas.get_width_height()
+        image = Image.frombuffer("RGBA", (width, height), canvas.buffer_rgba(),
+                                 "raw", "RGBA", 0, 1).copy()
+        dashboard_chart['key'] = key
+        dashboard_chart['image'] = image
+        return image
+
+def update_garment_pie(garment_data):
+    # Pie chart: move the existing wedges when the garments are the same, else redraw
+    ax = dashboard_chart['pie_ax']
+    labels = [row['garment_type'] for row in garment_data]
+    sizes = [row['count'] for row in garment_data]
+    ax.set_visible(bool(garment_data))
+    if not garment_data:
+        return
+    
+    if dashboard_chart.get('pie_labels') != labels:
+        ax.clear()
+        wedges, texts, autotexts = ax.pie(sizes, labels=labels, autopct='%1.1f%%',
+                                          colors=CHART_COLORS, textprops={'color': 'white'})
+        ax.set_title('Orders by Garment', color='white', fontsize=15)
+        dashboard_chart['pie'] = (wedges, texts, autotexts)
+        dashboard_chart['pie_labels'] = labels
+        return
+    
+    # Same layout maths as Axes.pie (start at 0°, counter-clockwise)
+    total = sum(sizes)
+    theta1 = 0
+    for wedge, text, autotext, size in zip(*dashboard_chart['pie'], sizes):
+        theta2 = theta1 + 360 * size / total
+        wedge.set_theta1(theta1)
+        wedge.set_theta2(theta2)
+        middle = math.radians((theta1 + theta2) / 2)
+        x, y = math.cos(middle), math.sin(middle)
+        text.set_position((1.1 * x, 1.1 * y))
+        text.set_horizontalalignment('left' if x > 0 else 'right')
+        autotext.set_position((0.6 * x, 0.6 * y))
+        autotext.set_text(f"{100 * size / total:.1f}%")
+        theta1 = theta2
+
+def update_status_bars(status_data):
+    # Bar chart: resize the existing bars when the statuses are the same, else redraw
+    ax = dashboard_chart['bar_ax']
+    labels = [row['status'] for row in status_data]
+    counts = [row['count'] for row in status_data]
+    ax.set_visible(bool(status_data))
+    if not status_data:
+        return
+    
+    if dashboard_chart.get('bar_labels') != labels:
+        ax.clear()
+        dashboard_chart['bars'] = ax.bar(labels, counts, color=CHART_COLORS)
+        ax.set_title('Orders by Status', color='white', fontsize=15)
+        ax.set_facecolor('#2b2b2b')
+        ax.tick_params(colors='white')
+        dashboard_chart['bar_labels'] = labels
+        return
+    
+    for bar, count in zip(dashboard_chart['bars'], counts):
+        bar.set_height(count)
+    ax.set_ylim(0, max(counts) * 1.05 or 1)
+
+def show_dashboard_page():
+    page = begin_page("Dashboard")
+    if page is None:
+        return
+    
+    # Title
+    title = ctk.CTkLabel(page, text="📊 Dashboard", 
+                        font=("Helvetica", 32, "bold"))
+    title.pack(pady=20, padx=30, anchor="w")
+    
+    # Stats frame
+    stats_frame = ctk.CTkFrame(page)
+    stats_frame.pack(fill="x", padx=30, pady=20)
+    
+    # Create stat cards (values are filled in by render)
+    stats = [
+        ("📦 Total Orders", lambda d: str(d['total_orders']), "#3b8ed0"),
+        ("⏳ Pending", lambda d: str(d['pending_orders']), "#ca5010"),
+        ("💰 This Month", lambda d: f"₹{d['month_revenue']:.2f}", "#107c10"),
+        ("📅 This Week", lambda d: f"₹{d['week_revenue']:.2f}", "#8764b8")
     ]
+    value_labels = []
     
-    for i, (label, value, color) in enumerate(stats):
+    for i, (label, _, color) in enumerate(stats):
         card = ctk.CTkFrame(stats_frame, fg_color=color, corner_radius=15)
         card.grid(row=0, column=i, padx=10, sticky="ew")
         stats_frame.grid_columnconfigure(i, weight=1)
         
-        value_label = ctk.CTkLabel(card, text=str(value), 
+        value_label = ctk.CTkLabel(card, text="…", 
                                    font=("Helvetica", 36, "bold"))
         value_label.pack(pady=(25, 5))
+        value_labels.append(value_label)
         
         text_label = ctk.CTkLabel(card, text=label, 
                                  font=("Helvetica", 15))
         text_label.pack(pady=(0, 25))
     
-    # Charts
-    chart_frame = ctk.CTkFrame(main_area)
+    # Revenue for any date range
+    range_frame = ctk.CTkFrame(page)
+    range_frame.pack(fill="x", padx=30)
+    
+    ctk.CTkLabel(range_frame, text="Revenue from", 
+                font=("Helvetica", 14)).pack(side="left", padx=10, pady=10)
+    from_entry = ctk.CTkEntry(range_frame, width=130, placeholder_text="YYYY-MM-DD")
+    from_entry.pack(side="left")
+    ctk.CTkLabel(range_frame, text="to", 
+                font=("Helvetica", 14)).pack(side="left", padx=10)
+    to_entry = ctk.CTkEntry(range_frame, width=130, placeholder_text="YYYY-MM-DD")
+    to_entry.pack(side="left")
+    range_label = ctk.CTkLabel(range_frame, text="", 
+                               font=("Helvetica", 14, "bold"))
+    
+    def show_range_revenue():
+        try:
+            start = datetime.strptime(from_entry.get(), "%Y-%m-%d").date()
+            end = datetime.strptime(to_entry.get(), "%Y-%m-%d").date()
+        except ValueError:
+            messagebox.showerror("Error", "Enter dates as YYYY-MM-DD")
+            return
+        range_label.configure(text="...")
+        run_in_background(
+            lambda: revenue_between(start, end),
+            lambda result: range_label.configure(
+                text=f"{result[0]} orders, ₹{result[1]:.2f}")
+        )
+    
+    ctk.CTkButton(range_frame, text="Show", width=80,
+                 command=show_range_revenue).pack(side="left", padx=10)
+    range_label.pack(side="left", padx=10)
+    
+    # Charts (rendered off the Tk thread, shown as an image scaled to fit)
+    chart_frame = ctk.CTkFrame(page)
     chart_frame.pack(fill="both", expand=True, padx=30, pady=20)
     
-    # Create charts
-    fig = Figure(figsize=(12, 5), facecolor='#2b2b2b')
+    chart_label = ctk.CTkLabel(chart_frame, text="Loading...", font=("Helvetica", 16))
+    chart_label.pack(fill="both", expand=True, padx=20, pady=20)
+    chart_state = {'image': None, 'ctk_image': None, 'width': 100}
     
-    # Pie chart
-    garment_data = fetch_data(
-        "SELECT garment_type, COUNT(*) as count FROM orders GROUP BY garment_type"
-    )
+    def chart_size(image):
+        width = chart_state['width']
+        return (width, int(width * image.height / image.width))
     
-    if garment_data:
-        ax1 = fig.add_subplot(121)
-        labels = [row['garment_type'] for row in garment_data]
-        sizes = [row['count'] for row in garment_data]
-        colors = ['#3b8ed0', '#ca5010', '#107c10', '#8764b8', '#00bcf2']
-        ax1.pie(sizes, labels=labels, autopct='%1.1f%%', colors=colors, textprops={'color': 'white'})
-        ax1.set_title('Orders by Garment', color='white', fontsize=15)
-        # Bar chart
-        status_data = fetch_data(
-            "SELECT status, COUNT(*) as count FROM orders GROUP BY status"
-        )
-        ax2 = fig.add_subplot(122)
-        status_labels = [row['status'] for row in status_data]
-        status_counts = [row['count'] for row in status_data]
-        ax2.bar(status_labels, status_counts, color=colors)
-        ax2.set_title('Orders by Status', color='white', fontsize=15)
-        ax2.set_facecolor('#2b2b2b')
-        ax2.tick_params(colors='white')
-    
-    # Add to window
-    canvas = FigureCanvasTkAgg(fig, chart_frame)
-    canvas.draw()
-    canvas.get_tk_widget().pack(fill="both", expand=True, padx=20, pady=20)
+    def fit_chart(event):
+        chart_state['width'] = max(event.width - 40, 100)
+        if chart_state['ctk_image']:
+            chart_state['ctk_image'].configure(size=chart_size(chart_state['image']))
+    
+    chart_frame.bind("<Configure>", fit_chart)
+    
+    # Numbers and chart change in place; the widgets above are built only once
+    def render(result):
+        data, image = result
+        for value_label, (_, value, _) in zip(value_labels, stats):
+            value_label.configure(text=value(data))
+        if image is not chart_state['image']:
+            chart_image = ctk.CTkImage(light_image=image, dark_image=image,
+                                       size=chart_size(image))
+            chart_label.configure(image=chart_image, text="")
+            chart_state.update(image=image, ctk_image=chart_image)
+    
+    def load():
+        data = load_dashboard_data()
+        return data, render_dashboard_chart(data)
+    
+    def on_error(e):
+        for value_label in value_labels:
+            value_label.configure(text="–")
+        chart_label.configure(image=None, text=f"Could not load the dashboard: {e}")
+        chart_state.update(image=None, ctk_image=None)
+    
+    def refresh():
+        # Cached numbers with an up-to-date chart need no work at all, so draw them straight away
+        data = dashboard_cache
+        if (data is not None and data['day'] == date.today()
+                and dashboard_chart.get('key') == chart_key(data)):
+            render((data, dashboard_chart['image']))
+        else:
+            run_in_background(load, render, on_error)
+    
+    def on_changes(delta):
+        if delta['orders'] or delta['removed_orders'] or delta['reload']:
+            refresh()
+    
+    pages["Dashboard"]['refresh'] = refresh
+    pages["Dashboard"]['on_changes'] = on_changes
+    refresh()
 
 # New Order Page
 def show_new_order_page():
-    global main_area, form_fields
+    global form_fields
+    page = begin_page("New Order")
+    if page is None:
+        return
     form_fields = {}
     
-    # Clear main area
-    for widget in main_area.winfo_children():
-        widget.destroy()
-    
     # Title
-    title = ctk.CTkLabel(main_area, text="➕ New Order", 
+    title = ctk.CTkLabel(page, text="➕ New Order", 
                         font=("Helvetica", 32, "bold"))
     title.pack(pady=20, padx=30, anchor="w")
     
     # Form frame
-    form_frame = ctk.CTkScrollableFrame(main_area)
+    form_frame = ctk.CTkScrollableFrame(page)
     form_frame.pack(fill="both", expand=True, padx=30, pady=20)
     
     # Use a rows_frame inside the scrollable frame and arrange fields with grid so labels and inputs align
@@ -422,48 +2421,80 @@ def show_new_order_page():
     add_row("Customer Name *", form_fields['name'], row_padding_y=(10,5))
 
     # Suggestions frame for autocomplete (parented to form_frame so it can be placed over other widgets)
-    suggestions_frame = ctk.CTkFrame(form_frame)
+    suggestions_frame = ctk.CTkFrame(form_frame, corner_radius=8)
 
-    # Autocomplete function (show suggestions right under the name entry)
-    def search_customers(event):
-        typed = form_fields['name'].get()
+    # Suggestion buttons are built once and refilled on each lookup
+    suggestion_buttons = []
+    suggested = []
+    search_state = {'after_id': None}
 
-        # Clear suggestions
-        for widget in suggestions_frame.winfo_children():
-            widget.destroy()
+    def fill_customer(index):
+        c = suggested[index]
+        form_fields['name'].delete(0, 'end')
+        form_fields['name'].insert(0, c['name'])
+        form_fields['contact'].delete(0, 'end')
+        form_fields['contact'].insert(0, c['contact'])
         suggestions_frame.place_forget()
 
-        if len(typed) >= 2:
-            customers = fetch_data(
-                "SELECT * FROM customers WHERE LOWER(name) LIKE %s LIMIT 5",
-                (f"%{typed.lower()}%",)
+    for i in range(SUGGESTION_LIMIT):
+        btn = ctk.CTkButton(suggestions_frame, text="", height=35, anchor="w",
+                            command=lambda i=i: fill_customer(i))
+        suggestion_buttons.append(btn)
+
+    # Autocomplete function (waits for a pause in typing before looking up)
+    def search_customers(event):
+        if search_state['after_id']:
+            form_frame.after_cancel(search_state['after_id'])
+        search_state['after_id'] = form_frame.after(AUTOCOMPLETE_DELAY_MS, run_search)
+
+    def run_search():
+        search_state['after_id'] = None
+        typed = form_fields['name'].get().strip()
+
+        if len(typed) < 2:
+            suggestions_frame.place_forget()
+            return
+
+        customers = search_customer_index(typed)
+        if customers is not None:
+            show_suggestions(typed, customers)
+        else:
+            # Index still loading, ask the database instead
+            run_in_background(
+                lambda: fetch_data(
+                    "SELECT id, name, contact FROM customers WHERE name LIKE %s OR contact LIKE %s LIMIT %s",
+                    (f"{typed}%", f"{typed}%", SUGGESTION_LIMIT)
+                ),
+                lambda customers: show_suggestions(typed, customers)
             )
 
-            if customers:
-                # Ensure the entry has been rendered so width is valid
-                form_fields['name'].update_idletasks()
-                entry_width = form_fields['name'].winfo_width() - 240
-
-                # Configure and place suggestions_frame directly under the name entry
-                suggestions_frame.configure(corner_radius=8, width=entry_width)
-                # place it relative to the name entry widget 
-                suggestions_frame.place(in_=form_fields['name'], relx=0, rely=1, x=0, y=4, anchor='nw')
-                suggestions_frame.lift()  
-
-                for customer in customers:
-                    def fill_customer(c=customer):
-                        form_fields['name'].delete(0, 'end')
-                        form_fields['name'].insert(0, c['name'])
-                        form_fields['contact'].delete(0, 'end')
-                        form_fields['contact'].insert(0, c['contact'])
-                        suggestions_frame.place_forget()
-
-                    btn = ctk.CTkButton(suggestions_frame,
-                                       text=f"{customer['name']} - {customer['contact']}",
-                                       width=entry_width, height=35,
-                                       anchor="w",
-                                       command=fill_customer)
-                    btn.pack(fill="x", pady=2, padx=2)
+    # Show suggestions right under the name entry
+    def show_suggestions(typed, customers):
+        # Ignore answers for text the user has already changed
+        if typed != form_fields['name'].get().strip():
+            return
+
+        if not customers:
+            suggestions_frame.place_forget()
+            return
+
+        # Ensure the entry has been rendered so width is valid
+        form_fields['name'].update_idletasks()
+        entry_width = form_fields['name'].winfo_width() - 240
+
+        suggested[:] = customers
+        for i, btn in enumerate(suggestion_buttons):
+            if i < len(customers):
+                btn.configure(text=f"{customers[i]['name']} - {customers[i]['contact']}",
+                              width=entry_width)
+                btn.pack(fill="x", pady=2, padx=2)
+            else:
+                btn.pack_forget()
+
+        # place it relative to the name entry widget 
+        suggestions_frame.configure(width=entry_width)
+        suggestions_frame.place(in_=form_fields['name'], relx=0, rely=1, x=0, y=4, anchor='nw')
+        suggestions_frame.lift()  
 
     form_fields['name'].bind('<KeyRelease>', search_customers)
 
@@ -550,6 +2581,54 @@ def show_new_order_page():
     invoice_btn.pack(side="left", padx=10)
 
 # Save Order Function
+def create_order(order):
+    # Save a new order in one transaction: upsert its customer by contact,
+    # insert the order and its measurements, and count it in the customer
+    # stats and rollups. order holds the form values (see save_order).
+    # Returns the order id; errors are raised with nothing written.
+    order_id = f"ORD{next_sequence_value('order'):05d}"
+    with transaction() as cursor:
+        # LAST_INSERT_ID(id) makes lastrowid the customer's id whether the row
+        # was inserted or already there
+        cursor.execute("""
+            INSERT INTO customers (name, contact) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+        """, (order['customer_name'], order['contact']))
+        customer_id = cursor.lastrowid
+        
+        cursor.execute("""
+            INSERT INTO orders (order_id, customer_id, garment_type, fabric, measurements,
+                                collar_type, sleeve_type, fit_type, delivery_date, notes,
+                                price, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'Pending')
+        """, (order_id, customer_id, order['garment_type'], order['fabric'],
+              json.dumps(order['measurements']), order['collar_type'], order['sleeve_type'],
+              order['fit_type'], order['delivery_date'], order['notes'], order['price']))
+        row_id = cursor.lastrowid
+        store_measurements(cursor, [(row_id, order['measurements'])])
+        stats_order_added(customer_id, order['price'])
+        rollup_add(None, order['garment_type'], 'Pending', 1, order['price'])
+        log_changes("order", "insert", [row_id], cursor)
+        # The upsert can't tell a new customer from an existing one; readers
+        # work that out from created_at
+        log_changes("customer", "update", [customer_id], cursor)
+    
+    if customers_by_id is not None and customer_id not in customers_by_id:
+        index_customer({'id': customer_id, 'name': order['customer_name'],
+                        'contact': order['contact']})
+    invalidate_dashboard_cache()
+    return order_id
+
+def reset_order_form():
+    # Empty the cached New Order form for the next order
+    for key in ('name', 'contact', 'delivery_date', 'price'):
+        form_fields[key].delete(0, "end")
+    for entry in form_fields['measurements'].values():
+        entry.delete(0, "end")
+    for key in ('garment_type', 'fabric', 'collar', 'sleeve', 'fit'):
+        form_fields[key].set(form_fields[key].cget("values")[0])
+    form_fields['notes'].delete("1.0", "end")
+
 def save_order():
     global form_fields
     try:
@@ -566,54 +2645,227 @@ def save_order():
             messagebox.showerror("Error", "Enter price")
             return
         
-        # Generate order ID
-        order_count = fetch_one("SELECT COUNT(*) as count FROM orders")['count']
-        order_id = f"ORD{order_count + 1:05d}"
-        
-        # Prepare measurements
+        # Prepare measurements (blank means not taken)
         measurements = {}
         for key, entry in form_fields['measurements'].items():
             value = entry.get()
             measurements[key] = float(value) if value else 0.0
+            if not 0 <= measurements[key] <= MEASUREMENT_MAX:
+                messagebox.showerror("Error", f"{key.replace('_', ' ').title()} must be "
+                                              f"between 0 and {MEASUREMENT_MAX}")
+                return
         
-        measurements_json = json.dumps(measurements)
-        
-        # Save customer if new
-        existing = fetch_one("SELECT * FROM customers WHERE contact = %s",
-                            (form_fields['contact'].get(),))
-        
-        if not existing:
-            run_query("INSERT INTO customers (name, contact) VALUES (%s, %s)",
-                     (form_fields['name'].get(), form_fields['contact'].get()))
-        
-        # Save order
-        query = """INSERT INTO orders (order_id, customer_name, contact, garment_type, 
-                  fabric, measurements, collar_type, sleeve_type, fit_type, 
-                  delivery_date, notes, price, status)
-                  VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'Pending')"""
-        
-        values = (
-            order_id,
-            form_fields['name'].get(),
-            form_fields['contact'].get(),
-            form_fields['garment_type'].get(),
-            form_fields['fabric'].get(),
-            measurements_json,
-            form_fields['collar'].get(),
-            form_fields['sleeve'].get(),
-            form_fields['fit'].get(),
-            form_fields['delivery_date'].get(),
-            form_fields['notes'].get("1.0", "end-1c"),
-            float(form_fields['price'].get())
-        )
-        
-        run_query(query, values)
+        order_id = create_order({
+            'customer_name': form_fields['name'].get(),
+            'contact': form_fields['contact'].get(),
+            'garment_type': form_fields['garment_type'].get(),
+            'fabric': form_fields['fabric'].get(),
+            'measurements': measurements,
+            'collar_type': form_fields['collar'].get(),
+            'sleeve_type': form_fields['sleeve'].get(),
+            'fit_type': form_fields['fit'].get(),
+            'delivery_date': form_fields['delivery_date'].get(),
+            'notes': form_fields['notes'].get("1.0", "end-1c"),
+            'price': float(form_fields['price'].get()),
+        })
         messagebox.showinfo("Success", f"Order {order_id} saved!")
-        show_new_order_page()
+        reset_order_form()
         
     except Exception as e:
         messagebox.showerror("Error", f"Failed: {str(e)}")
 
+# Shop Settings
+# The settings row is read once and kept here; PDFs, including the batch
+# workers (which get a copy with each job), never query it themselves.
+@dataclass(frozen=True)
+class ShopSettings:
+    shop_name: str
+    address: str
+    phone: str
+    tax_rate: Decimal
+
+def get_shop_settings():
+    # The cached shop settings, read from the database on first use
+    global shop_settings
+    with shop_settings_lock:
+        if shop_settings is None:
+            row = fetch_one("SELECT shop_name, address, phone, tax_rate FROM settings WHERE id = 1")
+            if row is None:
+                raise RuntimeError("Cannot read the shop settings")
+            shop_settings = ShopSettings(row['shop_name'], row['address'], row['phone'],
+                                         Decimal(row['tax_rate']))
+        return shop_settings
+
+def invalidate_shop_settings():
+    global shop_settings
+    with shop_settings_lock:
+        shop_settings = None
+
+def save_shop_settings(shop_name, address, phone, tax_rate):
+    # Store new settings with their change_log entry, then re-read them so the
+    # cache holds what the database kept. Returns the new ShopSettings; errors
+    # are raised with nothing written.
+    with transaction() as cursor:
+        cursor.execute("""
+            UPDATE settings SET shop_name = %s, address = %s, phone = %s, tax_rate = %s
+            WHERE id = 1
+        """, (shop_name, address, phone, tax_rate))
+        log_changes("settings", "update", [1], cursor)
+    invalidate_shop_settings()
+    return get_shop_settings()
+
+# PDF Functions
+# These take a plain order dict and a ShopSettings so they work the same for
+# the New Order form, stored orders, and batch jobs running in other processes.
+def draw_jobcard(filename, order, settings, generated_by):
+    # Write a job card PDF
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    pdf = canvas.Canvas(filename, pagesize=letter)
+    width, height = letter
+    
+    # Header
+    pdf.setFont("Helvetica-Bold", 20)
+    pdf.drawString(50, height - 50, "JOB CARD")
+    
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(50, height - 70, settings.shop_name)
+    pdf.drawString(50, height - 85, settings.address)
+    pdf.drawString(50, height - 100, settings.phone)
+    pdf.drawString(50, height - 115, 'Job card generated by ')
+    pdf.drawString(154, height - 115, generated_by)
+    if order.get('order_id'):
+        pdf.drawString(400, height - 70, f"Order #: {order['order_id']}")
+    if order.get('delivery_date'):
+        pdf.drawString(400, height - 85, f"Delivery: {order['delivery_date']}")
+    
+    # Details
+    y = height - 150
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(50, y, "Customer Details:")
+    
+    y -= 25
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(50, y, f"Name: {order['customer_name']}")
+    y -= 20
+    pdf.drawString(50, y, f"Contact: {order['contact']}")
+    
+    # Garment
+    y -= 40
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(50, y, "Garment Details:")
+    
+    y -= 25
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(50, y, f"Type: {order['garment_type']}")
+    y -= 20
+    pdf.drawString(50, y, f"Fabric: {order['fabric']}")
+    
+    # Measurements
+    y -= 40
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(50, y, "Measurements:")
+    
+    y -= 25
+    pdf.setFont("Helvetica", 10)
+    for key, value in order['measurements'].items():
+        pdf.drawString(50, y, f"{key.replace('_', ' ').title()}: {value} inches")
+        y -= 20
+    
+    pdf.save()
+    return filename
+
+def draw_invoice(filename, order, settings, invoice_number):
+    # Write an invoice PDF
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    pdf = canvas.Canvas(filename, pagesize=letter)
+    width, height = letter
+    
+    # Header
+    pdf.setFont("Helvetica-Bold", 24)
+    pdf.drawString(50, height - 50, "INVOICE")
+    
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(50, height - 75, settings.shop_name)
+    pdf.drawString(50, height - 90, settings.address)
+    
+    # Invoice number
+    pdf.drawString(400, height - 75, f"Date: {datetime.now().strftime('%Y-%m-%d')}")
+    pdf.drawString(400, height - 90, f"Invoice #: {invoice_number}")
+    
+    # Customer
+    y = height - 150
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(50, y, "Bill To:")
+    
+    y -= 20
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(50, y, order['customer_name'])
+    y -= 15
+    pdf.drawString(50, y, order['contact'])
+    
+    # Items
+    y -= 50
+    pdf.setFont("Helvetica-Bold", 10)
+    pdf.drawString(50, y, "Description")
+    pdf.drawString(300, y, "Qty")
+    pdf.drawString(400, y, "Price")
+    pdf.drawString(500, y, "Total")
+    
+    y -= 5
+    pdf.line(50, y, 550, y)
+    
+    y -= 25
+    pdf.setFont("Helvetica", 10)
+    base_price = float(order['price'])
+    
+    pdf.drawString(50, y, f"{order['garment_type']} - {order['fabric']}")
+    pdf.drawString(320, y, "1")
+    pdf.drawString(400, y, f"Rs.{base_price:.2f}")
+    pdf.drawString(500, y, f"Rs.{base_price:.2f}")
+    
+    # Totals
+    y -= 100
+    pdf.line(400, y, 550, y)
+    
+    y -= 20
+    pdf.drawString(400, y, "Subtotal:")
+    pdf.drawString(500, y, f"Rs.{base_price:.2f}")
+    
+    y -= 20
+    tax_amount = base_price * (float(settings.tax_rate) / 100)
+    pdf.drawString(400, y, f"Tax ({settings.tax_rate}%):")
+    pdf.drawString(500, y, f"Rs.{tax_amount:.2f}")
+    
+    y -= 20
+    pdf.line(400, y, 550, y)
+    
+    y -= 20
+    pdf.setFont("Helvetica-Bold", 12)
+    total = base_price + tax_amount
+    pdf.drawString(400, y, "Total:")
+    pdf.drawString(500, y, f"Rs.{total:.2f}")
+    
+    # Footer
+    pdf.setFont("Helvetica", 9)
+    pdf.drawString(50, 50, "Thank you for your business!")
+    
+    pdf.save()
+    return filename
+
+def form_order():
+    # The New Order form as an order dict for the PDF functions
+    return {
+        'customer_name': form_fields['name'].get(),
+        'contact': form_fields['contact'].get(),
+        'garment_type': form_fields['garment_type'].get(),
+        'fabric': form_fields['fabric'].get(),
+        'measurements': {key: entry.get() or "0.0"
+                         for key, entry in form_fields['measurements'].items()},
+        'price': form_fields['price'].get(),
+    }
+
 # Create Job Card Function
 def create_jobcard():
     global form_fields
@@ -624,60 +2876,7 @@ def create_jobcard():
         
         filename = f"JobCard_{form_fields['name'].get()}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         
-        # Create PDF
-        pdf = canvas.Canvas(filename, pagesize=letter)
-        width, height = letter
-        
-        # Get settings
-        settings = fetch_one("SELECT * FROM settings WHERE id = 1")
-
-        
-        # Header
-        pdf.setFont("Helvetica-Bold", 20)
-        pdf.drawString(50, height - 50, "JOB CARD")
-        
-        pdf.setFont("Helvetica", 10)
-        pdf.drawString(50, height - 70, settings['shop_name'])
-        pdf.drawString(50, height - 85, settings['address'])
-        pdf.drawString(50, height - 100, settings['phone'])
-        pdf.drawString(50, height - 115, 'Job card generated by ')
-        pdf.drawString(154, height - 115, logged_in_user)
-        
-        # Details
-        y = height - 150
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(50, y, "Customer Details:")
-        
-        y -= 25
-        pdf.setFont("Helvetica", 10)
-        pdf.drawString(50, y, f"Name: {form_fields['name'].get()}")
-        y -= 20
-        pdf.drawString(50, y, f"Contact: {form_fields['contact'].get()}")
-        
-        # Garment
-        y -= 40
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(50, y, "Garment Details:")
-        
-        y -= 25
-        pdf.setFont("Helvetica", 10)
-        pdf.drawString(50, y, f"Type: {form_fields['garment_type'].get()}")
-        y -= 20
-        pdf.drawString(50, y, f"Fabric: {form_fields['fabric'].get()}")
-        
-        # Measurements
-        y -= 40
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(50, y, "Measurements:")
-        
-        y -= 25
-        pdf.setFont("Helvetica", 10)
-        for key, entry in form_fields['measurements'].items():
-            value = entry.get() if entry.get() else "0.0"
-            pdf.drawString(50, y, f"{key.replace('_', ' ').title()}: {value} inches")
-            y -= 20
-        
-        pdf.save()
+        draw_jobcard(filename, form_order(), get_shop_settings(), logged_in_user)
         messagebox.showinfo("Success", f"Job Card saved: {filename}")
         
     except Exception as e:
@@ -693,277 +2892,638 @@ def create_invoice():
         
         filename = f"Invoice_{form_fields['name'].get()}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         
-        # Create PDF
-        pdf = canvas.Canvas(filename, pagesize=letter)
-        width, height = letter
-        
-        # Get settings
-        settings = fetch_one("SELECT * FROM settings WHERE id = 1")
-        
-        # Header
-        pdf.setFont("Helvetica-Bold", 24)
-        pdf.drawString(50, height - 50, "INVOICE")
-        
-        pdf.setFont("Helvetica", 10)
-        pdf.drawString(50, height - 75, settings['shop_name'])
-        pdf.drawString(50, height - 90, settings['address'])
-        
         # Invoice number
-        order_count = fetch_one("SELECT COUNT(*) as count FROM orders")['count']
-        pdf.drawString(400, height - 75, f"Date: {datetime.now().strftime('%Y-%m-%d')}")
-        pdf.drawString(400, height - 90, f"Invoice #: INV{order_count + 1:04d}")
+        invoice_number = f"INV{next_sequence_value('invoice'):04d}"
         
-        # Customer
-        y = height - 150
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(50, y, "Bill To:")
+        draw_invoice(filename, form_order(), get_shop_settings(), invoice_number)
+        messagebox.showinfo("Success", f"Invoice saved: {filename}")
         
-        y -= 20
-        pdf.setFont("Helvetica", 10)
-        pdf.drawString(50, y, form_fields['name'].get())
-        y -= 15
-        pdf.drawString(50, y, form_fields['contact'].get())
-        
-        # Items
-        y -= 50
-        pdf.setFont("Helvetica-Bold", 10)
-        pdf.drawString(50, y, "Description")
-        pdf.drawString(300, y, "Qty")
-        pdf.drawString(400, y, "Price")
-        pdf.drawString(500, y, "Total")
-        
-        y -= 5
-        pdf.line(50, y, 550, y)
-        
-        y -= 25
-        pdf.setFont("Helvetica", 10)
-        base_price = float(form_fields['price'].get())
-        
-        pdf.drawString(50, y, f"{form_fields['garment_type'].get()} - {form_fields['fabric'].get()}")
-        pdf.drawString(320, y, "1")
-        pdf.drawString(400, y, f"Rs.{base_price:.2f}")
-        pdf.drawString(500, y, f"Rs.{base_price:.2f}")
-        
-        # Totals
-        y -= 100
-        pdf.line(400, y, 550, y)
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed: {str(e)}")
+
+# Batch PDF Functions
+def fetch_batch_orders(order_ids=None, status="All", due=None):
+    # Stored orders for a batch: explicit ids, or a status and delivery date filter
+    if order_ids:
+        placeholders = ", ".join(["%s"] * len(order_ids))
+        return fetch_data(f"SELECT {ORDER_COLUMNS} FROM {ORDER_TABLES} "
+                          f"WHERE o.id IN ({placeholders}) ORDER BY o.id",
+                          tuple(order_ids))
+    
+    conditions = []
+    values = []
+    if status != "All":
+        conditions.append("o.status = %s")
+        values.append(status)
+    if due:
+        conditions.append("o.delivery_date = %s")
+        values.append(due)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return fetch_data(f"SELECT {ORDER_COLUMNS} FROM {ORDER_TABLES} {where} "
+                      f"ORDER BY o.delivery_date, o.id", tuple(values))
+
+def render_batch_pdf(job):
+    # Render one PDF of a batch (runs in a worker process)
+    kind, filename, order, settings, label = job
+    order = dict(order, measurements=json.loads(order['measurements']))
+    if kind == "invoice":
+        return draw_invoice(filename, order, settings, label)
+    return draw_jobcard(filename, order, settings, label)
+
+def generate_pdf_batch(kind, orders, on_progress=None, folder=None):
+    # Render job cards or invoices for stored orders across CPU cores.
+    # on_progress(done, total) is called on the Tk thread as PDFs finish.
+    # Returns the output folder and the number of PDFs that failed.
+    label = "Invoices" if kind == "invoice" else "JobCards"
+    folder = folder or f"{label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(folder, exist_ok=True)
+    settings = get_shop_settings()
+    prefix = "Invoice" if kind == "invoice" else "JobCard"
+    
+    # Invoices get their numbers here, jobs only carry plain data to the workers
+    jobs = []
+    for order in orders:
+        filename = os.path.join(folder, f"{prefix}_{order['order_id']}_{order['customer_name']}.pdf")
+        if kind == "invoice":
+            label = f"INV{next_sequence_value('invoice'):04d}"
+        else:
+            label = logged_in_user
+        jobs.append((kind, filename, order, settings, label))
+    
+    done = 0
+    failed = 0
+    # Spawn rather than fork: forking a process that runs Tk and threads is unsafe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=context) as pool:
+        futures = [pool.submit(render_batch_pdf, job) for job in jobs]
+        for future in as_completed(futures):
+            done += 1
+            if future.exception():
+                failed += 1
+                print(f"PDF error: {future.exception()}")
+            if on_progress:
+                ui_results.put((on_progress, (done, len(jobs))))
+    return folder, failed
+
+def show_batch_pdf_dialog():
+    # Dialog to render job cards or invoices for many stored orders at once
+    dialog = ctk.CTkToplevel(window)
+    dialog.title("Batch PDFs")
+    dialog.geometry("400x480")
+    dialog.transient(window)
+    dialog.grab_set()
+    
+    ctk.CTkLabel(dialog, text="📄 Batch PDFs", 
+                font=("Helvetica", 18, "bold")).pack(pady=20)
+    
+    ctk.CTkLabel(dialog, text="Document:", font=("Helvetica", 14)).pack()
+    kind_box = ctk.CTkComboBox(dialog, width=200, values=["Job Cards", "Invoices"])
+    kind_box.set("Job Cards")
+    kind_box.pack(pady=(5, 10))
+    
+    ctk.CTkLabel(dialog, text="Status:", font=("Helvetica", 14)).pack()
+    status_box = ctk.CTkComboBox(dialog, width=200,
+                                 values=["All", "Pending", "In Progress", "Ready", "Delivered"])
+    status_box.set("Ready")
+    status_box.pack(pady=(5, 10))
+    
+    ctk.CTkLabel(dialog, text="Due:", font=("Helvetica", 14)).pack()
+    due_box = ctk.CTkComboBox(dialog, width=200, values=["Any day", "Today", "Tomorrow"])
+    due_box.set("Tomorrow")
+    due_box.pack(pady=(5, 10))
+    
+    progress = ctk.CTkProgressBar(dialog, width=300)
+    progress.set(0)
+    progress.pack(pady=15)
+    progress_label = ctk.CTkLabel(dialog, text="", font=("Helvetica", 12))
+    progress_label.pack()
+    
+    def on_progress(done, total):
+        if progress.winfo_exists():
+            progress.set(done / total)
+            progress_label.configure(text=f"{done} of {total}")
+    
+    def on_done(result):
+        folder, count, failed = result
+        if count == 0:
+            messagebox.showinfo("Batch PDFs", "No orders match")
+        elif failed:
+            messagebox.showwarning("Batch PDFs",
+                                   f"{count - failed} of {count} PDFs saved in {folder}")
+        else:
+            messagebox.showinfo("Success", f"{count} PDFs saved in {folder}")
+        if dialog.winfo_exists():
+            dialog.destroy()
+    
+    def start():
+        kind = "invoice" if kind_box.get() == "Invoices" else "jobcard"
+        status = status_box.get()
+        due = {"Today": date.today(),
+               "Tomorrow": date.today() + timedelta(days=1)}.get(due_box.get())
+        generate_btn.configure(state="disabled")
+        progress_label.configure(text="Loading orders...")
         
-        y -= 20
-        pdf.drawString(400, y, "Subtotal:")
-        pdf.drawString(500, y, f"Rs.{base_price:.2f}")
+        def work():
+            orders = fetch_batch_orders(status=status, due=due)
+            if not orders:
+                return None, 0, 0
+            folder, failed = generate_pdf_batch(kind, orders, on_progress)
+            return folder, len(orders), failed
         
-        y -= 20
-        tax_amount = base_price * (float(settings['tax_rate']) / 100)
-        pdf.drawString(400, y, f"Tax ({settings['tax_rate']}%):")
-        pdf.drawString(500, y, f"Rs.{tax_amount:.2f}")
+        run_in_background(work, on_done, cancellable=False, page_bound=False)
+    
+    generate_btn = ctk.CTkButton(dialog, text="Generate", width=200, height=45,
+                                 command=start)
+    generate_btn.pack(pady=20)
+
+# All Orders Page
+def fetch_orders_page(status="All", after=None, limit=ORDERS_PAGE_SIZE):
+    # One page of orders, newest first, continuing after the (created_at, id) key
+    conditions = []
+    values = []
+    if status != "All":
+        conditions.append("o.status = %s")
+        values.append(status)
+    if after:
+        conditions.append("(o.created_at < %s OR (o.created_at = %s AND o.id < %s))")
+        values.extend([after[0], after[0], after[1]])
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # Ask for one extra row to know whether another page exists
+    values.append(limit + 1)
+    orders = fetch_data(
+        f"SELECT {ORDER_COLUMNS} FROM {ORDER_TABLES} {where} "
+        f"ORDER BY o.created_at DESC, o.id DESC LIMIT %s",
+        tuple(values)
+    )
+    return orders[:limit], len(orders) > limit
+
+# Bulk edits run as one UPDATE/DELETE ... WHERE id IN (...) in a single
+# transaction, with the rollups and customer stats adjusted once per batch.
+# The rows are re-read under lock, so the adjustments match what's stored.
+def lock_orders(cursor, order_ids):
+    placeholders = ", ".join(["%s"] * len(order_ids))
+    cursor.execute(f"""
+        SELECT id, customer_id, status, price, garment_type, created_at
+        FROM orders WHERE id IN ({placeholders}) FOR UPDATE
+    """, tuple(order_ids))
+    return [dict(zip(("id", "customer_id", "status", "price", "garment_type", "created_at"), row))
+            for row in cursor.fetchall()]
+
+def apply_rollup_deltas(cursor, rollups):
+    # rollups maps (day, garment_type, status) -> (count, revenue) to add
+    cursor.executemany("""
+        INSERT INTO daily_rollups (day, garment_type, status, order_count, revenue)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE order_count = order_count + VALUES(order_count),
+                                revenue = revenue + VALUES(revenue)
+    """, [(day, garment, status, count, round(revenue, 2))
+          for (day, garment, status), (count, revenue) in rollups.items() if count or revenue])
+
+def update_order(order_id, new_status, new_price):
+    # Change one order's status and price in a single transaction, moving its
+    # rollup bucket and customer spend by what was actually stored. Returns
+    # the order as locked before the change, or None if it's gone.
+    if new_status not in ORDER_STATUSES:
+        raise ValueError(f"Unknown status: {new_status}")
+    new_price = round(float(new_price), 2)     # As the DECIMAL(10, 2) column will store it
+    with transaction() as cursor:
+        orders = lock_orders(cursor, [order_id])
+        if not orders:
+            return None
+        order = orders[0]
+        old_price = float(order['price'])
+        if order['status'] == new_status and old_price == new_price:
+            return order
+        cursor.execute(f"""
+            UPDATE orders SET status = %s, price = %s, {DELIVERED_AT_SQL} WHERE id = %s
+        """, (new_status, new_price, order_id))
         
-        y -= 20
-        pdf.line(400, y, 550, y)
+        day = order['created_at'].date()
+        rollups = {(day, order['garment_type'], order['status']): (-1, -old_price)}
+        count, revenue = rollups.get((day, order['garment_type'], new_status), (0, 0.0))
+        rollups[(day, order['garment_type'], new_status)] = (count + 1, revenue + new_price)
+        apply_rollup_deltas(cursor, rollups)
+        log_changes("order", "update", [order_id], cursor)
         
-        y -= 20
-        pdf.setFont("Helvetica-Bold", 12)
-        total = base_price + tax_amount
-        pdf.drawString(400, y, "Total:")
-        pdf.drawString(500, y, f"Rs.{total:.2f}")
+        if new_price != old_price:
+            # run_query joins this transaction (and raises on failure)
+            stats_price_changed(order['customer_id'], old_price, new_price)
+            log_changes("customer", "update", [order['customer_id']], cursor)
+    invalidate_dashboard_cache()
+    return order
+
+def bulk_update_status(order_ids, new_status):
+    # Set the status of many orders at once. Returns the number changed.
+    if new_status not in ORDER_STATUSES:
+        raise ValueError(f"Unknown status: {new_status}")
+    with transaction() as cursor:
+        orders = [order for order in lock_orders(cursor, order_ids)
+                  if order['status'] != new_status]
+        if not orders:
+            return 0
+        placeholders = ", ".join(["%s"] * len(orders))
+        cursor.execute(f"""
+            UPDATE orders SET status = %s, {DELIVERED_AT_SQL} WHERE id IN ({placeholders})
+        """, (new_status,) + tuple(order['id'] for order in orders))
+        log_changes("order", "update", [order['id'] for order in orders], cursor)
         
-        # Footer
-        pdf.setFont("Helvetica", 9)
-        pdf.drawString(50, 50, "Thank you for your business!")
+        rollups = {}
+        for order in orders:
+            price = float(order['price'])
+            for status, sign in ((order['status'], -1), (new_status, 1)):
+                key = (order['created_at'].date(), order['garment_type'], status)
+                count, revenue = rollups.get(key, (0, 0.0))
+                rollups[key] = (count + sign, revenue + sign * price)
+        apply_rollup_deltas(cursor, rollups)
+    invalidate_dashboard_cache()
+    return len(orders)
+
+def bulk_delete_orders(order_ids):
+    # Delete many orders at once. Returns the number deleted.
+    with transaction() as cursor:
+        orders = lock_orders(cursor, order_ids)
+        if not orders:
+            return 0
+        placeholders = ", ".join(["%s"] * len(orders))
+        cursor.execute(f"DELETE FROM orders WHERE id IN ({placeholders})",
+                       tuple(order['id'] for order in orders))
+        log_changes("order", "delete", [order['id'] for order in orders], cursor)
         
-        pdf.save()
-        messagebox.showinfo("Success", f"Invoice saved: {filename}")
+        rollups = {}
+        for order in orders:
+            key = (order['created_at'].date(), order['garment_type'], order['status'])
+            count, revenue = rollups.get(key, (0, 0.0))
+            rollups[key] = (count - 1, revenue - float(order['price']))
+        apply_rollup_deltas(cursor, rollups)
         
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed: {str(e)}")
+        # Recount the affected customers from what's left of their orders,
+        # archived ones included
+        customer_ids = tuple({order['customer_id'] for order in orders})
+        placeholders = ", ".join(["%s"] * len(customer_ids))
+        history = " UNION ALL ".join(
+            f"SELECT customer_id, price, created_at FROM {table} WHERE customer_id IN ({placeholders})"
+            for table, _ in HISTORY_TABLES)
+        cursor.execute(f"""
+            UPDATE customer_stats s
+            LEFT JOIN (
+                SELECT customer_id, COUNT(*) AS order_count, SUM(price) AS total_spent,
+                       MAX(created_at) AS last_order_at
+                FROM ({history}) h GROUP BY customer_id
+            ) o ON o.customer_id = s.customer_id
+            SET s.order_count = COALESCE(o.order_count, 0),
+                s.total_spent = COALESCE(o.total_spent, 0),
+                s.last_order_at = o.last_order_at
+            WHERE s.customer_id IN ({placeholders})
+        """, customer_ids * (len(HISTORY_TABLES) + 1))
+        log_changes("customer", "update", customer_ids, cursor)
+    invalidate_dashboard_cache()
+    return len(orders)
 
-# All Orders Page
 def show_all_orders_page():
-    global main_area
-    # Clear main area
-    for widget in main_area.winfo_children():
-        widget.destroy()
+    page = begin_page("All Orders")
+    if page is None:
+        return
     
     # Title
-    title = ctk.CTkLabel(main_area, text="📋 All Orders", 
+    title = ctk.CTkLabel(page, text="📋 All Orders", 
                         font=("Helvetica", 32, "bold"))
     title.pack(pady=20, padx=30, anchor="w")
     
     # Filter frame
-    filter_frame = ctk.CTkFrame(main_area)
+    filter_frame = ctk.CTkFrame(page)
     filter_frame.pack(fill="x", padx=30, pady=10)
     
     ctk.CTkLabel(filter_frame, text="Filter by Status:", 
                 font=("Helvetica", 14)).pack(side="left", padx=10)
     
-    # Function to load orders
-    def load_orders(status):
-        # Clear orders
-        for widget in orders_frame.winfo_children():
-            widget.destroy()
+    # Status button
+    status_colors = {
+        "Pending": "#ca5010",
+        "In Progress": "#0078d4",
+        "Ready": "#107c10",
+        "Delivered": "#8764b8"
+    }
+    
+    def change_status(o):
+        # Dialog to change status
+        dialog = ctk.CTkToplevel(window)
+        dialog.title("Change Status")
+        dialog.geometry("350x420")
+        dialog.transient(window)
+        dialog.grab_set()
         
-        # Get orders
-        if status == "All":
-            orders = fetch_data("SELECT * FROM orders ORDER BY created_at DESC")
-        else:
-            orders = fetch_data(
-                "SELECT * FROM orders WHERE status = %s ORDER BY created_at DESC",
-                (status,)
-            )
+        ctk.CTkLabel(dialog, text=f"Order: {o['order_id']}", 
+                    font=("Helvetica", 18, "bold")).pack(pady=20)
         
-        if not orders:
-            no_orders = ctk.CTkLabel(orders_frame, text="No orders found",
-                                    font=("Helvetica", 16))
-            no_orders.pack(pady=50)
-            return
+        ctk.CTkLabel(dialog, text="Select new status:", 
+                    font=("Helvetica", 14)).pack(pady=10)
         
-        # Display orders
-        for order in orders:
-            order_card = ctk.CTkFrame(orders_frame, corner_radius=10)
-            order_card.pack(fill="x", pady=8)
-            
-            info_frame = ctk.CTkFrame(order_card,fg_color='#2B2B2B')
-            info_frame.pack(fill="x", padx=20, pady=15)
-            
-            # Left side
-            left_frame = ctk.CTkFrame(info_frame)
-            left_frame.pack(side="left", fill="x", expand=True)
-            
-            ctk.CTkLabel(left_frame, text=f"📦 {order['order_id']}", 
-                        font=("Helvetica", 16, "bold")).pack(anchor="w")
-            ctk.CTkLabel(left_frame, text=f"Customer: {order['customer_name']}", 
-                        font=("Helvetica", 12)).pack(anchor="w", pady=3)
-            ctk.CTkLabel(left_frame, text=f"Item: {order['garment_type']}", 
-                        font=("Helvetica", 11)).pack(anchor="w")
-            
-            # Middle
-            middle_frame = ctk.CTkFrame(info_frame)
-            middle_frame.pack(side="left", padx=30)
-            
-            ctk.CTkLabel(middle_frame, text=f"Delivery: {order['delivery_date'],}", 
-                        font=("Helvetica", 11)).pack(anchor="w")
-            ctk.CTkLabel(middle_frame, text=f"Price: ₹{order['price']:.2f}", 
-                        font=("Helvetica", 13, "bold")).pack(anchor="w", pady=5)
-            
-            # Right side
-            right_frame = ctk.CTkFrame(info_frame)
-            right_frame.pack(side="right")
-            
-            # Status button
-            status_colors = {
-                "Pending": "#ca5010",
-                "In Progress": "#0078d4",
-                "Ready": "#107c10",
-                "Delivered": "#8764b8"
-            }
+        status_var = ctk.StringVar(value=o['status'])
+        
+        for s in ["Pending", "In Progress", "Ready", "Delivered"]:
+            ctk.CTkRadioButton(dialog, text=s, 
+                             variable=status_var, 
+                             value=s).pack(pady=5)
+        
+        ctk.CTkLabel(dialog, text="Price (₹):", 
+                    font=("Helvetica", 14)).pack(pady=(15, 5))
+        price_entry = ctk.CTkEntry(dialog, width=200, height=35)
+        price_entry.insert(0, f"{o['price']:.2f}")
+        price_entry.pack()
+        
+        def save():
+            new_status = status_var.get()
+            try:
+                new_price = float(price_entry.get())
+            except ValueError:
+                messagebox.showerror("Error", "Enter a valid price")
+                return
+            dialog.destroy()
             
-            def change_status(o=order):
-                # Dialog to change status
-                dialog = ctk.CTkToplevel(window)
-                dialog.title("Change Status")
-                dialog.geometry("350x300")
-                dialog.transient(window)
-                dialog.grab_set()
-                
-                ctk.CTkLabel(dialog, text=f"Order: {o['order_id']}", 
-                            font=("Helvetica", 18, "bold")).pack(pady=20)
-                
-                ctk.CTkLabel(dialog, text="Select new status:", 
-                            font=("Helvetica", 14)).pack(pady=10)
-                
-                status_var = ctk.StringVar(value=o['status'])
-                
-                for s in ["Pending", "In Progress", "Ready", "Delivered"]:
-                    ctk.CTkRadioButton(dialog, text=s, 
-                                     variable=status_var, 
-                                     value=s).pack(pady=5)
-                
-                def save():
-                    run_query("UPDATE orders SET status = %s WHERE id = %s",
-                             (status_var.get(), o['id']))
-                    dialog.destroy()
-                    show_all_orders_page()
-                
-                ctk.CTkButton(dialog, text="Save", width=200, height=45,
-                             command=save).pack(pady=20)
+            def on_updated(order):
+                if order:
+                    patch_orders([dict(o, status=new_status, price=new_price)])
+                else:
+                    order_list.remove_row(o['id'])
+                    messagebox.showerror("Error", "This order was deleted or archived elsewhere")
             
-            status_btn = ctk.CTkButton(right_frame, text=order['status'], 
-                                      width=120, height=35,
-                                      fg_color=status_colors.get(order['status'], "#0078d4"),
-                                      command=change_status)
-            status_btn.pack(pady=(0, 10))
+            def on_failed(e):
+                messagebox.showerror("Error", f"Could not update the order: {e}")
+                load_orders(status_filter.get())
             
-            # Actions
-            actions_frame = ctk.CTkFrame(right_frame)
-            actions_frame.pack()
+            run_in_background(lambda: update_order(o['id'], new_status, new_price),
+                              on_updated, on_failed, cancellable=False, page_bound=False)
+        
+        ctk.CTkButton(dialog, text="Save", width=200, height=45,
+                     command=save).pack(pady=20)
+    
+    def view_order(o):
+        # View order dialog
+        dialog = ctk.CTkToplevel(window)
+        dialog.title(f"Order Details - {o['order_id']}")
+        dialog.geometry("700x750")
+        dialog.transient(window)
+        
+        # Header
+        header = ctk.CTkFrame(dialog, height=80)
+        header.pack(fill="x")
+        header.pack_propagate(False)
+        
+        ctk.CTkLabel(header, text=f"📦 {o['order_id']}", 
+                    font=("Helvetica", 24, "bold")).pack(pady=25)
+        
+        # Scrollable content
+        scroll = ctk.CTkScrollableFrame(dialog)
+        scroll.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # Details
+        details = [
+            ("Customer", o['customer_name']),
+            ("Contact", o['contact']),
+            ("Garment", o['garment_type']),
+            ("Fabric", o['fabric']),
+            ("Status", o['status']),
+            ("Delivery", str(o['delivery_date'])),
+            ("Price", f"₹{o['price']:.2f}"),
+        ]
+        
+        for label, value in details:
+            frame = ctk.CTkFrame(scroll)
+            frame.pack(fill="x", pady=5)
             
-            def view_order(o=order):
-                # View order dialog
-                dialog = ctk.CTkToplevel(window)
-                dialog.title(f"Order Details - {o['order_id']}")
-                dialog.geometry("700x750")
-                dialog.transient(window)
-                
-                # Header
-                header = ctk.CTkFrame(dialog, height=80)
-                header.pack(fill="x")
-                header.pack_propagate(False)
-                
-                ctk.CTkLabel(header, text=f"📦 {o['order_id']}", 
-                            font=("Helvetica", 24, "bold")).pack(pady=25)
-                
-                # Scrollable content
-                scroll = ctk.CTkScrollableFrame(dialog)
-                scroll.pack(fill="both", expand=True, padx=20, pady=20)
-                
-                # Details
-                details = [
-                    ("Customer", o['customer_name']),
-                    ("Contact", o['contact']),
-                    ("Garment", o['garment_type']),
-                    ("Fabric", o['fabric']),
-                    ("Status", o['status']),
-                    ("Delivery", str(o['delivery_date'])),
-                    ("Price", f"₹{o['price']:.2f}"),
-                ]
-                
-                for label, value in details:
-                    frame = ctk.CTkFrame(scroll)
-                    frame.pack(fill="x", pady=5)
-                    
-                    ctk.CTkLabel(frame, text=f"{label}:", width=150, 
-                                anchor="w", font=("Helvetica", 12, "bold")).pack(side="left", padx=10)
-                    ctk.CTkLabel(frame, text=str(value), anchor="w").pack(side="left")
-                
-                # Measurements
-                ctk.CTkLabel(scroll, text="Measurements:", 
-                            font=("Helvetica", 16, "bold")).pack(anchor="w", pady=10)
+            ctk.CTkLabel(frame, text=f"{label}:", width=150, 
+                        anchor="w", font=("Helvetica", 12, "bold")).pack(side="left", padx=10)
+            ctk.CTkLabel(frame, text=str(value), anchor="w").pack(side="left")
+        
+        # Measurements
+        ctk.CTkLabel(scroll, text="Measurements:", 
+                    font=("Helvetica", 16, "bold")).pack(anchor="w", pady=10)
+        
+        loading = show_loading(scroll)
+        
+        def show_measurements(measurements):
+            if not scroll.winfo_exists():
+                return
+            loading.destroy()
+            for key, value in measurements.items():
+                frame = ctk.CTkFrame(scroll)
+                frame.pack(fill="x", pady=3)
                 
-                measurements = json.loads(o['measurements'])
-                for key, value in measurements.items():
-                    frame = ctk.CTkFrame(scroll)
-                    frame.pack(fill="x", pady=3)
-                    
-                    ctk.CTkLabel(frame, text=f"{key.replace('_', ' ').title()}:", 
-                                width=150, anchor="w").pack(side="left", padx=10)
-                    ctk.CTkLabel(frame, text=f"{value} inches").pack(side="left")
-            
-            def delete_order(o=order):
-                result = messagebox.askyesno("Delete", f"Delete order {o['order_id']}?")
-                if result:
-                    run_query("DELETE FROM orders WHERE id = %s", (o['id'],))
+                ctk.CTkLabel(frame, text=f"{key.replace('_', ' ').title()}:", 
+                            width=150, anchor="w").pack(side="left", padx=10)
+                ctk.CTkLabel(frame, text=f"{value} inches").pack(side="left")
+        
+        run_in_background(lambda: fetch_measurements(o['id']), show_measurements,
+                          cancellable=False, page_bound=False)
+    
+    def delete_order(o):
+        result = messagebox.askyesno("Delete", f"Delete order {o['order_id']}?")
+        if result:
+            # Same locked path as bulk deletes, so an order already gone
+            # elsewhere isn't taken off the stats and rollups twice
+            def on_deleted(deleted):
+                selected.discard(o['id'])
+                order_list.remove_row(o['id'])
+                if list_state['version'] is not None:
+                    list_state['version'] = dashboard_version
+                update_bulk_bar()
+                if deleted:
                     messagebox.showinfo("Success", "Order deleted")
-                    show_all_orders_page()
+                else:
+                    messagebox.showinfo("Delete", "This order was already deleted or archived")
             
-            view_btn = ctk.CTkButton(actions_frame, text="👁️", 
-                                    width=40, height=35,
-                                    command=view_order)
-            view_btn.pack(side="left", padx=2)
+            def on_failed(e):
+                messagebox.showerror("Error", f"Could not delete the order: {e}")
             
-            delete_btn = ctk.CTkButton(actions_frame, text="🗑️", 
-                                      width=40, height=35,
-                                      fg_color="#c42b1c",
-                                      command=delete_order)
-            delete_btn.pack(side="left", padx=2)
+            run_in_background(lambda: bulk_delete_orders([o['id']]),
+                              on_deleted, on_failed, cancellable=False, page_bound=False)
+    
+    # Build one reusable order card (the list recycles these while scrolling)
+    def make_order_card(parent):
+        card = {}
+        order_card = ctk.CTkFrame(parent, corner_radius=10)
+        order_card.pack(fill="both", expand=True, pady=8)
+        
+        info_frame = ctk.CTkFrame(order_card,fg_color='#2B2B2B')
+        info_frame.pack(fill="x", padx=20, pady=15)
+        
+        # Selection box for bulk actions
+        card['select'] = ctk.CTkCheckBox(info_frame, text="", width=24,
+                                         command=lambda: toggle_selected(card))
+        card['select'].pack(side="left", padx=(0, 10))
+        
+        # Left side
+        left_frame = ctk.CTkFrame(info_frame)
+        left_frame.pack(side="left", fill="x", expand=True)
+        
+        card['order_id'] = ctk.CTkLabel(left_frame, font=("Helvetica", 16, "bold"))
+        card['order_id'].pack(anchor="w")
+        card['customer'] = ctk.CTkLabel(left_frame, font=("Helvetica", 12))
+        card['customer'].pack(anchor="w", pady=3)
+        card['item'] = ctk.CTkLabel(left_frame, font=("Helvetica", 11))
+        card['item'].pack(anchor="w")
+        
+        # Middle
+        middle_frame = ctk.CTkFrame(info_frame)
+        middle_frame.pack(side="left", padx=30)
+        
+        card['delivery'] = ctk.CTkLabel(middle_frame, font=("Helvetica", 11))
+        card['delivery'].pack(anchor="w")
+        card['price'] = ctk.CTkLabel(middle_frame, font=("Helvetica", 13, "bold"))
+        card['price'].pack(anchor="w", pady=5)
+        
+        # Right side
+        right_frame = ctk.CTkFrame(info_frame)
+        right_frame.pack(side="right")
+        
+        card['status'] = ctk.CTkButton(right_frame, width=120, height=35,
+                                       command=lambda: change_status(card['row']))
+        card['status'].pack(pady=(0, 10))
+        
+        # Actions
+        actions_frame = ctk.CTkFrame(right_frame)
+        actions_frame.pack()
+        
+        view_btn = ctk.CTkButton(actions_frame, text="👁️", 
+                                width=40, height=35,
+                                command=lambda: view_order(card['row']))
+        view_btn.pack(side="left", padx=2)
+        
+        delete_btn = ctk.CTkButton(actions_frame, text="🗑️", 
+                                  width=40, height=35,
+                                  fg_color="#c42b1c",
+                                  command=lambda: delete_order(card['row']))
+        delete_btn.pack(side="left", padx=2)
+        return card
+    
+    # Point a recycled card at an order
+    def fill_order_card(card, order):
+        card['order_id'].configure(text=f"📦 {order['order_id']}")
+        card['customer'].configure(text=f"Customer: {order['customer_name']}")
+        card['item'].configure(text=f"Item: {order['garment_type']}")
+        card['delivery'].configure(text=f"Delivery: {order['delivery_date']}")
+        card['price'].configure(text=f"Price: ₹{order['price']:.2f}")
+        card['status'].configure(text=order['status'],
+                                 fg_color=status_colors.get(order['status'], "#0078d4"))
+        if order['id'] in selected:
+            card['select'].select()
+        else:
+            card['select'].deselect()
+    
+    # Ids of the ticked orders; the bulk bar acts on these
+    selected = set()
+    
+    def toggle_selected(card):
+        order_id = card['row']['id']
+        if card['select'].get():
+            selected.add(order_id)
+        else:
+            selected.discard(order_id)
+        update_bulk_bar()
+    
+    def select_all_loaded():
+        selected.update(order['id'] for order in order_list.rows)
+        order_list.render(force=True)
+        update_bulk_bar()
+    
+    def clear_selection():
+        selected.clear()
+        order_list.render(force=True)
+        update_bulk_bar()
+    
+    def update_bulk_bar():
+        if selected:
+            bulk_count.configure(text=f"{len(selected)} selected")
+            bulk_bar.pack(fill="x", padx=30, pady=(0, 10), before=order_list.frame)
+        else:
+            bulk_bar.pack_forget()
+    
+    def bulk_set_status():
+        new_status = bulk_status.get()
+        order_ids = sorted(selected)
+        
+        def on_updated(changed):
+            orders = [order_list.get_row(order_id) for order_id in order_ids]
+            patch_orders([dict(order, status=new_status) for order in orders if order])
+            clear_selection()
+            messagebox.showinfo("Success", f"{changed} orders moved to {new_status}")
+        
+        def on_failed(e):
+            messagebox.showerror("Error", f"Could not update the orders: {e}")
+        
+        run_in_background(lambda: bulk_update_status(order_ids, new_status),
+                          on_updated, on_failed, cancellable=False, page_bound=False)
+    
+    def bulk_delete():
+        order_ids = sorted(selected)
+        if not messagebox.askyesno("Delete", f"Delete {len(order_ids)} orders?"):
+            return
+        
+        def on_deleted(deleted):
+            order_list.remove_rows(order_ids)
+            if list_state['version'] is not None:
+                list_state['version'] = dashboard_version
+            clear_selection()
+            messagebox.showinfo("Success", f"{deleted} orders deleted")
+        
+        def on_failed(e):
+            messagebox.showerror("Error", f"Could not delete the orders: {e}")
+        
+        run_in_background(lambda: bulk_delete_orders(order_ids),
+                          on_deleted, on_failed, cancellable=False, page_bound=False)
+    
+    # version is the dashboard_version the loaded rows are current for
+    # (None while the first page is on its way)
+    list_state = {'seq': 0, 'status': "All", 'version': None}
+    
+    # Function to load orders (first page of the chosen filter)
+    def load_orders(status):
+        # Only the most recent filter's pages get drawn
+        list_state['seq'] += 1
+        list_state['status'] = status
+        seq = list_state['seq']
+        list_state['version'] = None
+        version = dashboard_version
+        selected.clear()
+        update_bulk_bar()
+        order_list.clear("Loading...")
+        
+        def first_page(result):
+            if seq == list_state['seq']:
+                list_state['version'] = version
+            show_page(seq, result, True)
+        
+        run_in_background(lambda: fetch_orders_page(status), first_page)
+    
+    # Fetch the next page when the user scrolls near the end
+    def load_next_page():
+        seq = list_state['seq']
+        status = list_state['status']
+        last = order_list.rows[-1]
+        after = (last['created_at'], last['id'])
+        
+        run_in_background(lambda: fetch_orders_page(status, after),
+                          lambda result: show_page(seq, result, False))
+    
+    def show_page(seq, result, first):
+        if seq != list_state['seq']:
+            return
+        orders, has_more = result
+        if first:
+            order_list.set_rows(orders, has_more)
+        else:
+            order_list.append_rows(orders, has_more)
+    
+    # Patch edited orders into the list without reloading it
+    def shown(order):
+        return list_state['status'] in ("All", order['status'])
+    
+    def patch_orders(orders):
+        order_list.update_rows([order for order in orders if shown(order)])
+        order_list.remove_rows([order['id'] for order in orders if not shown(order)])
+        if list_state['version'] is not None:
+            list_state['version'] = dashboard_version
     
     status_filter = ctk.CTkComboBox(
         filter_frame, width=200,
@@ -973,65 +3533,115 @@ def show_all_orders_page():
     status_filter.set("All")
     status_filter.pack(side="left", padx=10)
     
-    # Orders frame
-    orders_frame = ctk.CTkScrollableFrame(main_area)
-    orders_frame.pack(fill="both", expand=True, padx=30, pady=20)
+    batch_btn = ctk.CTkButton(filter_frame, text="📄 Batch PDFs", width=140,
+                              command=show_batch_pdf_dialog)
+    batch_btn.pack(side="right", padx=10)
+    
+    select_btn = ctk.CTkButton(filter_frame, text="☑ Select All", width=120,
+                               command=select_all_loaded)
+    select_btn.pack(side="right", padx=10)
+    
+    # Bulk action bar, shown while any orders are ticked
+    bulk_bar = ctk.CTkFrame(page)
+    bulk_count = ctk.CTkLabel(bulk_bar, text="", font=("Helvetica", 14, "bold"))
+    bulk_count.pack(side="left", padx=10, pady=10)
+    ctk.CTkLabel(bulk_bar, text="Set status:", 
+                font=("Helvetica", 14)).pack(side="left", padx=(20, 5))
+    bulk_status = ctk.CTkComboBox(bulk_bar, width=160, values=ORDER_STATUSES)
+    bulk_status.set("Ready")
+    bulk_status.pack(side="left")
+    ctk.CTkButton(bulk_bar, text="Apply", width=80,
+                 command=bulk_set_status).pack(side="left", padx=10)
+    ctk.CTkButton(bulk_bar, text="Clear", width=80,
+                 command=clear_selection).pack(side="right", padx=10)
+    ctk.CTkButton(bulk_bar, text="🗑️ Delete Selected", width=150, fg_color="#c42b1c",
+                 command=bulk_delete).pack(side="right", padx=10)
+    
+    # Orders list
+    order_list = VirtualList(page, ORDER_ROW_HEIGHT,
+                             make_order_card, fill_order_card,
+                             load_more=load_next_page,
+                             empty_text="No orders found",
+                             key=lambda order: order['id'])
+    order_list.pack(fill="both", expand=True, padx=30, pady=20)
+    
+    # Coming back to the page only reloads if orders changed elsewhere
+    def refresh():
+        if list_state['version'] != dashboard_version:
+            load_orders(status_filter.get())
+        else:
+            order_list.resume()
+    
+    # Changes made at other terminals (see load_changes)
+    def on_changes(delta):
+        if delta['reload']:
+            refresh()
+            return
+        removed = delta['removed_orders']
+        selected.difference_update(removed)
+        order_list.remove_rows(removed)
+        patch_orders([order for order in delta['orders'] if order_list.get_row(order['id'])])
+        
+        # Orders new to this list, created or edited into the filter, are
+        # merged in if they fall inside the pages loaded so far
+        last = order_list.rows[-1] if order_list.rows else None
+        new = [order for order in delta['orders']
+               if not order_list.get_row(order['id']) and shown(order) and
+               (last is None or not order_list.has_more or
+                (order['created_at'], order['id']) > (last['created_at'], last['id']))]
+        if new:
+            order_list.insert_rows(new, lambda order: (order['created_at'], order['id']))
+        update_bulk_bar()
+    
+    pages["All Orders"]['refresh'] = refresh
+    pages["All Orders"]['on_changes'] = on_changes
     
     # Load all orders
     load_orders("All")
 
 # Customers Page
+def fetch_customers_page(after=None, limit=CUSTOMERS_PAGE_SIZE):
+    # One page of customers with their stats, newest first, after the (created_at, id) key
+    where = ""
+    values = []
+    if after:
+        where = "WHERE c.created_at < %s OR (c.created_at = %s AND c.id < %s)"
+        values = [after[0], after[0], after[1]]
+    values.append(limit + 1)
+    customers = fetch_data(f"""
+        SELECT c.*, COALESCE(s.order_count, 0) AS order_count,
+               COALESCE(s.total_spent, 0) AS spent, s.last_order_at
+        FROM customers c LEFT JOIN customer_stats s ON s.customer_id = c.id
+        {where}
+        ORDER BY c.created_at DESC, c.id DESC LIMIT %s
+    """, tuple(values))
+    return customers[:limit], len(customers) > limit
+
 def show_customers_page():
-    global main_area
-    # Clear main area
-    for widget in main_area.winfo_children():
-        widget.destroy()
+    page = begin_page("Customers")
+    if page is None:
+        return
     
     # Title
-    title = ctk.CTkLabel(main_area, text="👥 Customers", 
+    title = ctk.CTkLabel(page, text="👥 Customers", 
                         font=("Helvetica", 32, "bold"))
     title.pack(pady=20, padx=30, anchor="w")
     
     # Stats card
-    customer_count = fetch_one("SELECT COUNT(*) as count FROM customers")['count']
-    
-    stats_card = ctk.CTkFrame(main_area, corner_radius=15, fg_color='#2B2B2B')
+    stats_card = ctk.CTkFrame(page, corner_radius=15, fg_color='#2B2B2B')
     stats_card.pack(fill="x", padx=30, pady=10)
     
-    ctk.CTkLabel(stats_card, text=str(customer_count), 
-                font=("Helvetica", 28, "bold")).pack(pady=(20, 5))
+    count_label = ctk.CTkLabel(stats_card, text="…", 
+                               font=("Helvetica", 28, "bold"))
+    count_label.pack(pady=(20, 5))
     ctk.CTkLabel(stats_card, text="Total Customers", 
                 font=("Helvetica", 16)).pack(pady=(0, 20))
     
-    # Customers list
-    customers_frame = ctk.CTkScrollableFrame(main_area)
-    customers_frame.pack(fill="both", expand=True, padx=30, pady=20)
-    
-    # Get customers
-    customers = fetch_data("SELECT * FROM customers ORDER BY created_at DESC")
-    
-    if not customers:
-        ctk.CTkLabel(customers_frame, text="No customers found",
-                    font=("Helvetica", 16)).pack(pady=50)
-        return
-    
-    # Display customers
-    for customer in customers:
-        # Get stats
-        order_count = fetch_one(
-            "SELECT COUNT(*) as count FROM orders WHERE contact = %s",
-            (customer['contact'],)
-        )['count']
-        
-        total_spent = fetch_one(
-            "SELECT SUM(price) as total FROM orders WHERE contact = %s",
-            (customer['contact'],)
-        )
-        spent = total_spent['total'] if total_spent['total'] else 0
-        
-        # Customer card
-        customer_card = ctk.CTkFrame(customers_frame, corner_radius=10)
-        customer_card.pack(fill="x", pady=8)
+    # Customer card (recycled while scrolling)
+    def make_customer_card(parent):
+        card = {}
+        customer_card = ctk.CTkFrame(parent, corner_radius=10)
+        customer_card.pack(fill="both", expand=True, pady=8)
         
         info_frame = ctk.CTkFrame(customer_card, fg_color='#2B2B2B')
         info_frame.pack(fill="x", padx=20, pady=15)
@@ -1040,80 +3650,164 @@ def show_customers_page():
         left_frame = ctk.CTkFrame(info_frame)
         left_frame.pack(side="left", fill="x", expand=True)
         
-        ctk.CTkLabel(left_frame, text=f"👤 {customer['name']}", 
-                    font=("Helvetica", 16, "bold")).pack(anchor="w")
-        ctk.CTkLabel(left_frame, text=f"📞 {customer['contact']}", 
-                    font=("Helvetica", 12)).pack(anchor="w", pady=3)
+        card['name'] = ctk.CTkLabel(left_frame, font=("Helvetica", 16, "bold"))
+        card['name'].pack(anchor="w")
+        card['contact'] = ctk.CTkLabel(left_frame, font=("Helvetica", 12))
+        card['contact'].pack(anchor="w", pady=3)
         
         # Right
         right_frame = ctk.CTkFrame(info_frame)
         right_frame.pack(side="right", padx=20)
         
-        ctk.CTkLabel(right_frame, text=f"Orders: {order_count}", 
-                    font=("Helvetica", 13)).pack(anchor="e")
-        ctk.CTkLabel(right_frame, text=f"Total: ₹{spent:.2f}", 
-                    font=("Helvetica", 14, "bold")).pack(anchor="e", pady=5)
+        card['orders'] = ctk.CTkLabel(right_frame, font=("Helvetica", 13))
+        card['orders'].pack(anchor="e")
+        card['spent'] = ctk.CTkLabel(right_frame, font=("Helvetica", 14, "bold"))
+        card['spent'].pack(anchor="e", pady=5)
+        card['last_order'] = ctk.CTkLabel(right_frame, font=("Helvetica", 11))
+        card['last_order'].pack(anchor="e")
+        return card
+    
+    def fill_customer_card(card, customer):
+        last_order = customer['last_order_at']
+        card['name'].configure(text=f"👤 {customer['name']}")
+        card['contact'].configure(text=f"📞 {customer['contact']}")
+        card['orders'].configure(text=f"Orders: {customer['order_count']}")
+        card['spent'].configure(text=f"Total: ₹{customer['spent']:.2f}")
+        card['last_order'].configure(
+            text=f"Last order: {last_order:%Y-%m-%d}" if last_order else "No orders yet")
+    
+    # Fetch the next page when the user scrolls near the end
+    def load_next_page():
+        seq = list_state['seq']
+        last = customer_list.rows[-1]
+        after = (last['created_at'], last['id'])
+        
+        def next_page(result):
+            if seq == list_state['seq']:
+                customer_list.append_rows(*result)
+        
+        run_in_background(lambda: fetch_customers_page(after), next_page)
+    
+    # Customers list
+    customer_list = VirtualList(page, CUSTOMER_ROW_HEIGHT,
+                                make_customer_card, fill_customer_card,
+                                load_more=load_next_page,
+                                empty_text="No customers found",
+                                key=lambda customer: customer['id'])
+    customer_list.pack(fill="both", expand=True, padx=30, pady=20)
+    
+    # version is the dashboard_version the loaded rows are current for
+    # (None while a load is on its way); only the latest load's pages are drawn
+    list_state = {'seq': 0, 'version': None}
+    
+    def load_customers():
+        list_state['seq'] += 1
+        list_state['version'] = None
+        seq = list_state['seq']
+        version = dashboard_version
+        customer_list.clear("Loading...")
+        
+        def load():
+            count = fetch_one("SELECT COUNT(*) as count FROM customers")['count']
+            return fetch_customers_page(), count
+        
+        def first_page(result):
+            if seq != list_state['seq']:
+                return
+            (customers, has_more), count = result
+            list_state['version'] = version
+            customer_list.set_rows(customers, has_more)
+            count_label.configure(text=str(count))
+        
+        run_in_background(load, first_page)
+    
+    # Orders and customers change together, so the dashboard version covers both
+    def refresh():
+        if list_state['version'] != dashboard_version:
+            load_customers()
+        else:
+            customer_list.resume()
+    
+    # Changes made at other terminals (see load_changes)
+    def on_changes(delta):
+        if delta['reload']:
+            refresh()
+            return
+        customers = delta['customers']
+        customer_list.update_rows([c for c in customers if customer_list.get_row(c['id'])])
+        
+        # Customers newer than the top of the list were added since it loaded
+        first = customer_list.rows[0] if customer_list.rows else None
+        new = [c for c in customers if not customer_list.get_row(c['id']) and
+               (first is None or (c['created_at'], c['id']) > (first['created_at'], first['id']))]
+        if new:
+            customer_list.insert_rows(new, lambda c: (c['created_at'], c['id']))
+            count = count_label.cget("text")
+            if count.isdigit():
+                count_label.configure(text=str(int(count) + len(new)))
+        if list_state['version'] is not None:
+            list_state['version'] = dashboard_version
+    
+    pages["Customers"]['refresh'] = refresh
+    pages["Customers"]['on_changes'] = on_changes
+    load_customers()
 
 # Settings Page
 def show_settings_page():
-    global main_area
-    # Clear main area
-    for widget in main_area.winfo_children():
-        widget.destroy()
+    page = begin_page("Settings")
+    if page is None:
+        return
     
     # Title
-    title = ctk.CTkLabel(main_area, text="⚙️ Settings", 
+    title = ctk.CTkLabel(page, text="⚙️ Settings", 
                         font=("Helvetica", 32, "bold"))
     title.pack(pady=20, padx=30, anchor="w")
     
     # Settings form
-    settings_frame = ctk.CTkScrollableFrame(main_area)
+    settings_frame = ctk.CTkScrollableFrame(page)
     settings_frame.pack(fill="both", expand=True, padx=30, pady=20)
     
-    # Get settings
-    settings = fetch_one("SELECT * FROM settings WHERE id = 1")
+    settings = get_shop_settings()
     
     # Shop Name
     ctk.CTkLabel(settings_frame, text="Shop Name:", 
                 font=("Helvetica", 13, "bold")).pack(pady=5, anchor="w")
     shop_name_entry = ctk.CTkEntry(settings_frame, width=400, height=40)
-    shop_name_entry.insert(0, settings['shop_name'])
+    shop_name_entry.insert(0, settings.shop_name)
     shop_name_entry.pack(pady=5)
     
     # Address
     ctk.CTkLabel(settings_frame, text="Address:", 
                 font=("Helvetica", 13, "bold")).pack(pady=5, anchor="w")
     address_entry = ctk.CTkEntry(settings_frame, width=400, height=40)
-    address_entry.insert(0, settings['address'])
+    address_entry.insert(0, settings.address)
     address_entry.pack(pady=5)
     
     # Phone
     ctk.CTkLabel(settings_frame, text="Phone:", 
                 font=("Helvetica", 13, "bold")).pack(pady=5, anchor="w")
     phone_entry = ctk.CTkEntry(settings_frame, width=400, height=40)
-    phone_entry.insert(0, settings['phone'])
+    phone_entry.insert(0, settings.phone)
     phone_entry.pack(pady=5)
     
     # Tax Rate
     ctk.CTkLabel(settings_frame, text="Tax Rate (%):", 
                 font=("Helvetica", 13, "bold")).pack(pady=5, anchor="w")
     tax_entry = ctk.CTkEntry(settings_frame, width=400, height=40)
-    tax_entry.insert(0, str(settings['tax_rate']))
+    tax_entry.insert(0, str(settings.tax_rate))
     tax_entry.pack(pady=5)
     
+    fields = [(shop_name_entry, 'shop_name'), (address_entry, 'address'),
+              (phone_entry, 'phone'), (tax_entry, 'tax_rate')]
+    shown = {'settings': settings}
+    
     # Save function
     def save_settings():
         try:
-            query = """UPDATE settings 
-                      SET shop_name = %s, address = %s, phone = %s, tax_rate = %s
-                      WHERE id = 1"""
-            values = (
-                shop_name_entry.get(),
-                address_entry.get(),
-                phone_entry.get(),
-                float(tax_entry.get())
-            )
-            run_query(query, values)
+            shown['settings'] = save_shop_settings(shop_name_entry.get(),
+                                                   address_entry.get(),
+                                                   phone_entry.get(),
+                                                   float(tax_entry.get()))
             messagebox.showinfo("Success", "Settings saved!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed: {str(e)}")
@@ -1123,16 +3817,329 @@ def show_settings_page():
                             command=save_settings)
     save_btn.pack(pady=30)
     
+    # Settings saved at another terminal replace the ones shown, except in
+    # fields edited here and not saved yet
+    def show_settings(new):
+        for entry, name in fields:
+            if entry.get() == str(getattr(shown['settings'], name)):
+                entry.delete(0, "end")
+                entry.insert(0, str(getattr(new, name)))
+        shown['settings'] = new
+    
+    # Coming back to the page picks up saves made while it was hidden
+    def refresh():
+        run_in_background(get_shop_settings, show_settings)
+    
+    def on_changes(delta):
+        if delta['settings']:
+            refresh()
+    
+    pages["Settings"]['refresh'] = refresh
+    pages["Settings"]['on_changes'] = on_changes
+    
+    # Data
+    ctk.CTkLabel(settings_frame, text="Data:", 
+                font=("Helvetica", 13, "bold")).pack(pady=5, anchor="w")
+    import_btn = ctk.CTkButton(settings_frame, text="📥 Import Customers & Orders", 
+                              width=250, height=50,
+                              command=show_import_dialog)
+    import_btn.pack(pady=10)
+    export_btn = ctk.CTkButton(settings_frame, text="📤 Export Orders / Customers", 
+                              width=250, height=50,
+                              command=show_export_dialog)
+    export_btn.pack(pady=10)
+
+def show_import_dialog():
+    # Pick a CSV/JSONL file and import it in the background
+    path = filedialog.askopenfilename(
+        title="Import Customers & Orders",
+        filetypes=[("CSV or JSONL", "*.csv *.jsonl *.json"), ("All files", "*.*")]
+    )
+    if not path:
+        return
+    
+    dialog = ctk.CTkToplevel(window)
+    dialog.title("Import")
+    dialog.geometry("400x200")
+    dialog.transient(window)
+    dialog.grab_set()
+    
+    ctk.CTkLabel(dialog, text="📥 Importing", 
+                font=("Helvetica", 18, "bold")).pack(pady=20)
+    ctk.CTkLabel(dialog, text=os.path.basename(path), font=("Helvetica", 12)).pack()
+    progress_label = ctk.CTkLabel(dialog, text="Starting...", font=("Helvetica", 12))
+    progress_label.pack(pady=15)
+    
+    def on_progress(rows):
+        if progress_label.winfo_exists():
+            progress_label.configure(text=f"{rows:,} rows read")
+    
+    def on_done(result):
+        if dialog.winfo_exists():
+            dialog.destroy()
+        summary = (f"{result['orders']:,} orders and {result['customers']:,} customers "
+                   f"imported from {result['rows']:,} rows")
+        if result['rejected']:
+            messagebox.showwarning("Import", f"{summary}.\n{result['rejected']:,} rows rejected, "
+                                             f"see {result['rejects_file']}")
+        else:
+            messagebox.showinfo("Success", summary)
+    
+    def on_error(e):
+        if dialog.winfo_exists():
+            dialog.destroy()
+        messagebox.showerror("Error", f"Import failed: {e}")
+    
+    run_in_background(
+        lambda: import_file(path, on_progress=lambda rows: ui_results.put((on_progress, (rows,)))),
+        on_done, on_error, cancellable=False, page_bound=False
+    )
+    
+def show_export_dialog():
+    # Choose what to export, then stream it to a file in the background
+    dialog = ctk.CTkToplevel(window)
+    dialog.title("Export")
+    dialog.geometry("400x560")
+    dialog.transient(window)
+    dialog.grab_set()
+    
+    ctk.CTkLabel(dialog, text="📤 Export", 
+                font=("Helvetica", 18, "bold")).pack(pady=20)
+    
+    ctk.CTkLabel(dialog, text="Table:", font=("Helvetica", 14)).pack()
+    tables = {"Orders": "orders", "Archived Orders": "orders_archive", "Customers": "customers"}
+    table_box = ctk.CTkComboBox(dialog, width=200, values=list(tables))
+    table_box.set("Orders")
+    table_box.pack(pady=(5, 10))
+    
+    formats = {"CSV": ("csv", ".csv"), "JSONL": ("jsonl", ".jsonl"),
+               "Columns (gzip)": ("columns", ".cols.gz")}
+    ctk.CTkLabel(dialog, text="Format:", font=("Helvetica", 14)).pack()
+    format_box = ctk.CTkComboBox(dialog, width=200, values=list(formats))
+    format_box.set("CSV")
+    format_box.pack(pady=(5, 10))
+    
+    ctk.CTkLabel(dialog, text="Status (orders):", font=("Helvetica", 14)).pack()
+    status_box = ctk.CTkComboBox(dialog, width=200, values=["All"] + ORDER_STATUSES)
+    status_box.set("All")
+    status_box.pack(pady=(5, 10))
+    
+    ctk.CTkLabel(dialog, text="Created from / to:", font=("Helvetica", 14)).pack()
+    dates_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+    dates_frame.pack(pady=(5, 10))
+    from_entry = ctk.CTkEntry(dates_frame, width=110, placeholder_text="YYYY-MM-DD")
+    from_entry.pack(side="left", padx=5)
+    to_entry = ctk.CTkEntry(dates_frame, width=110, placeholder_text="YYYY-MM-DD")
+    to_entry.pack(side="left", padx=5)
+    
+    progress_label = ctk.CTkLabel(dialog, text="", font=("Helvetica", 12))
+    progress_label.pack(pady=10)
+    
+    def on_progress(rows):
+        if progress_label.winfo_exists():
+            progress_label.configure(text=f"{rows:,} rows written")
+    
+    def on_done(count):
+        if dialog.winfo_exists():
+            dialog.destroy()
+        messagebox.showinfo("Success", f"{count:,} rows exported")
+    
+    def on_error(e):
+        if dialog.winfo_exists():
+            dialog.destroy()
+        messagebox.showerror("Error", f"Export failed: {e}")
+    
+    def start():
+        try:
+            start_date = date.fromisoformat(from_entry.get()) if from_entry.get() else None
+            end_date = date.fromisoformat(to_entry.get()) if to_entry.get() else None
+        except ValueError:
+            messagebox.showerror("Error", "Dates must be YYYY-MM-DD", parent=dialog)
+            return
+        table = tables[table_box.get()]
+        fmt, extension = formats[format_box.get()]
+        status = status_box.get()
+        path = filedialog.asksaveasfilename(
+            parent=dialog, title="Export", defaultextension=extension,
+            initialfile=f"{table}_{date.today().isoformat()}{extension}"
+        )
+        if not path:
+            return
+        export_btn.configure(state="disabled")
+        progress_label.configure(text="Exporting...")
+        run_in_background(
+            lambda: export_table(table, path, fmt, start_date, end_date, status,
+                                 lambda rows: ui_results.put((on_progress, (rows,)))),
+            on_done, on_error, cancellable=False, page_bound=False
+        )
+    
+    export_btn = ctk.CTkButton(dialog, text="Export", width=200, height=45,
+                               command=start)
+    export_btn.pack(pady=20)
+
+# Diagnostics Page
+def show_diagnostics_page():
+    page = begin_page("Diagnostics", cache=False)
+    if page is None:
+        return
+    
+    # Title
+    title = ctk.CTkLabel(page, text="🩺 Diagnostics", 
+                        font=("Helvetica", 32, "bold"))
+    title.pack(pady=20, padx=30, anchor="w")
+    
+    # Controls
+    controls = ctk.CTkFrame(page, fg_color="transparent")
+    controls.pack(fill="x", padx=30)
+    
+    def toggle_recording():
+        global QUERY_STATS_ENABLED
+        QUERY_STATS_ENABLED = bool(record_switch.get())
+    
+    record_switch = ctk.CTkSwitch(controls, text="Record query timings",
+                                  command=toggle_recording)
+    if QUERY_STATS_ENABLED:
+        record_switch.select()
+    record_switch.pack(side="left")
+    
+    def reset():
+        reset_diagnostics()
+        show_diagnostics_page()
+    
+    ctk.CTkButton(controls, text="Reset", width=100,
+                 command=reset).pack(side="right", padx=5)
+    ctk.CTkButton(controls, text="🔄 Refresh", width=100,
+                 command=show_diagnostics_page).pack(side="right", padx=5)
+    
+    ctk.CTkLabel(page, text=f"Queries over {SLOW_QUERY_MS} ms are logged to "
+                                 f"{os.path.abspath(SLOW_QUERY_LOG)}",
+                font=("Helvetica", 12), text_color="gray").pack(padx=30, pady=5, anchor="w")
+    
+    scroll = ctk.CTkScrollableFrame(page)
+    scroll.pack(fill="both", expand=True, padx=30, pady=10)
+    
+    def table(heading, columns, rows):
+        ctk.CTkLabel(scroll, text=heading, 
+                    font=("Helvetica", 18, "bold")).pack(anchor="w", pady=(10, 5))
+        grid = ctk.CTkFrame(scroll)
+        grid.pack(fill="x", pady=5)
+        for col, name in enumerate(columns):
+            ctk.CTkLabel(grid, text=name, font=("Helvetica", 12, "bold")).grid(
+                row=0, column=col, padx=8, pady=4, sticky="w")
+        for r, row in enumerate(rows, 1):
+            for col, value in enumerate(row):
+                ctk.CTkLabel(grid, text=value, font=("Helvetica", 12), justify="left",
+                            wraplength=380 if col == 0 else 0).grid(
+                    row=r, column=col, padx=8, pady=2, sticky="w")
+        if not rows:
+            ctk.CTkLabel(grid, text="Nothing recorded yet", text_color="gray").grid(
+                row=1, column=0, padx=8, pady=4, sticky="w")
+    
+    # Top queries by total time
+    query_rows = []
+    for key, stats in top_queries():
+        top_site = max(stats['sites'], key=stats['sites'].get)
+        query_rows.append((
+            key,
+            str(stats['calls']),
+            f"{stats['total_ms']:.0f}",
+            f"{stats['total_ms'] / stats['calls']:.1f}",
+            histogram_percentile(stats['histogram'], 0.95),
+            f"{stats['max_ms']:.1f}",
+            f"{stats['rows'] / stats['calls']:.1f}",
+            top_site,
+        ))
+    table("Top Queries", ["Query", "Calls", "Total ms", "Avg ms", "p95", "Max ms",
+                          "Rows/call", "Called from"], query_rows)
+    
+    # Page render times
+    page_rows = []
+    for name, timing in sorted(page_timings.items()):
+        data_ms = timing['data_last_ms']
+        page_rows.append((
+            name,
+            str(timing['renders']),
+            f"{timing['build_total_ms'] / timing['renders']:.0f}",
+            f"{timing['build_last_ms']:.0f}",
+            f"{timing['build_max_ms']:.0f}",
+            f"{data_ms:.0f}" if data_ms is not None else "-",
+        ))
+    table("Page Render Times", ["Page", "Renders", "Avg build ms", "Last build ms",
+                                "Max build ms", "First data ms"], page_rows)
+
+# Command Line
+CLI_COMMANDS = ["import", "export", "archive"]
+
+def run_cli(argv):
+    # Tools that run without a window, e.g. python main.py import orders.csv
+    parser = argparse.ArgumentParser(prog="main.py", description="OmniFlow command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    importer = commands.add_parser("import", help="import customers and orders from CSV or JSONL")
+    importer.add_argument("file")
+    importer.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    
+    exporter = commands.add_parser("export", help="export orders or customers")
+    exporter.add_argument("table", choices=["orders", "orders_archive", "customers"])
+    exporter.add_argument("file", help="format follows the extension: .csv, .jsonl, .cols.gz")
+    exporter.add_argument("--format", choices=EXPORT_FORMATS)
+    exporter.add_argument("--from", dest="start", type=date.fromisoformat, help="YYYY-MM-DD")
+    exporter.add_argument("--to", dest="end", type=date.fromisoformat, help="YYYY-MM-DD")
+    exporter.add_argument("--status", choices=["All"] + ORDER_STATUSES, default="All")
+    
+    archiver = commands.add_parser("archive", help="move old delivered orders to the archive")
+    archiver.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                          help="archive orders delivered more than this many days ago")
+    archiver.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    
+    args = parser.parse_args(argv)
+    if not connect_database() or not run_migrations():
+        return 1
+    try:
+        if args.command == "import":
+            started = time.perf_counter()
+            result = import_file(args.file, args.batch_size,
+                                 lambda rows: print(f"{rows:,} rows read", flush=True))
+            print(f"Imported {result['orders']:,} orders and {result['customers']:,} customers "
+                  f"from {result['rows']:,} rows in {time.perf_counter() - started:.1f}s")
+            if result['rejected']:
+                print(f"{result['rejected']:,} rows rejected, see {result['rejects_file']}")
+        elif args.command == "export":
+            started = time.perf_counter()
+            count = export_table(args.table, args.file, args.format, args.start, args.end,
+                                 args.status, lambda rows: print(f"{rows:,} rows written", flush=True))
+            print(f"Exported {count:,} rows to {args.file} in {time.perf_counter() - started:.1f}s")
+        elif args.command == "archive":
+            started = time.perf_counter()
+            total = 0
+            while True:
+                moved = archive_delivered_orders(args.days, args.batch_size)
+                total += moved
+                if moved < args.batch_size:
+                    break
+                print(f"{total:,} orders archived", flush=True)
+            print(f"Archived {total:,} orders in {time.perf_counter() - started:.1f}s")
+    finally:
+        close_database()
+    return 0
+
 # Main Program
 def main():
-    global window, connection, logged_in_user
+    global window, logged_in_user
+    
+    if len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+        sys.exit(run_cli(sys.argv[1:]))
 
     window = ctk.CTk()
     window.title("OmniFlow - Universal Order Processing & Billing System")
     window.geometry("1400x850")
 
     if connect_database():
-        create_tables()
+        if not run_migrations():
+            messagebox.showerror("Error", "Cannot update the database schema. If another "
+                                          "terminal is updating it, start again once it has finished.")
+            return
+        start_background_workers()
         if DEBUG_MODE:
             logged_in_user = "T.CHARAN"
             show_main_page()
@@ -1143,11 +4150,24 @@ def main():
         return
 
     def on_close():
-        if connection:
-            connection.close()
+        stop_background_workers()
+        close_database()
         window.destroy()
 
     window.protocol("WM_DELETE_WINDOW", on_close)
+    
+    # Time to first window (benchmark mode exits as soon as it is drawn)
+    window.update()
+    startup_seconds = time.perf_counter() - APP_START
+    print(f"Ready in {startup_seconds:.2f}s")
+    if "--startup-benchmark" in sys.argv:
+        print(f"STARTUP_SECONDS {startup_seconds:.4f}", flush=True)
+        on_close()
+        return
+    
+    # Warm up the heavy libraries while the user logs in
+    window.after(PRELOAD_DELAY_MS, preload_heavy_modules)
+    window.after(ARCHIVE_START_MS, archive_in_background)
     window.mainloop()
 
 # Run the program